@@ -411,16 +411,17 @@ def switch_to_patches_menu(root_widget=None) -> None:
     if "patch_version_prefixe" in buttons_frame:
         buttons_frame["patch_version_prefixe"].set(selected_prefix)
     
-    # Refresh patches with the saved prefix
-    refresh_patches(patches_listbox, False, selected_prefix, username)
-    
     # Restore selected patch if applicable
-    if patches_state.get("selected_patch"):
-        for item_id in patches_listbox.get_children():
-            patch_name = patches_listbox.item(item_id, "values")[0]
-            if patch_name == patches_state["selected_patch"]:
-                patches_listbox.selection_set(item_id)
-                break
+    def restore_selected_patch():
+        if patches_state.get("selected_patch"):
+            for item_id in patches_listbox.get_children():
+                patch_name = patches_listbox.item(item_id, "values")[0]
+                if patch_name == patches_state["selected_patch"]:
+                    patches_listbox.selection_set(item_id)
+                    break
+
+    # Refresh patches with the saved prefix, the first page of a prefix arrives in the background
+    refresh_patches(patches_listbox, False, selected_prefix, username, on_loaded=restore_selected_patch)
     
     # Set the current menu
     state_manager.current_menu = "patches"
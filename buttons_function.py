@@ -6,7 +6,6 @@ import os
 from svn_operations import get_file_info, get_file_info_batch
 from config import load_config
 from tkinter import messagebox
-import subprocess
 
 def lock_selected_files(files_listbox):
     selected_files = [files_listbox.item(item, "values")[2] for item in files_listbox.selection()]
@@ -40,7 +39,7 @@ def check_files_is_present(files_listbox, files):
 
 def handle_drop(event, listbox):
     """Handle drag and drop of files/directories onto the listbox."""
-    from svn_operations import get_relative_path
+    from svn_operations import get_relative_path, get_wc_context
     
     files = listbox.tk.splitlist(event.data)
     config = load_config()
@@ -55,18 +54,13 @@ def handle_drop(event, listbox):
 
     # Get SVN working copy root
     try:
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
-    except subprocess.SubprocessError as e:
+        wc_context = get_wc_context()
+    except Exception as e:
         messagebox.showerror("Error", f"Failed to get SVN working copy root: {e}")
         return
     
-    svn_relative_path = get_relative_path(svn_path)
+    wc_root = wc_context.wc_root
+    svn_relative_path = wc_context.relative_path
     
     def is_file_in_svn_scope(file_path):
         """Check if a file is within the SVN scope."""
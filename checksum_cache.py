@@ -0,0 +1,236 @@
+# checksum_cache.py
+import hashlib
+import mmap
+import os
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Dict, Iterable, Optional
+from config import log_error
+from export_cache import cache_root
+
+# Set to False to always hash files from scratch
+USE_CHECKSUM_CACHE = True
+
+# hashlib releases the GIL on large buffers, so files are hashed in parallel threads
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+HASH_BUFFER_SIZE = 8 * 1024 * 1024  # 8 MB
+# Files at least this large are hashed through a memory map instead of buffered reads
+MMAP_THRESHOLD = 64 * 1024 * 1024  # 64 MB
+CHECKSUM_DB_NAME = "checksums.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS CHECKSUMS (
+    PATH TEXT PRIMARY KEY,
+    SIZE INTEGER NOT NULL,
+    MTIME_NS INTEGER NOT NULL,
+    MD5 TEXT NOT NULL
+);
+"""
+
+def md5_file(file_path: str, size: Optional[int] = None) -> str:
+    """MD5 of a file, read through a memory map when large and in big buffers otherwise."""
+    md5_hash = hashlib.md5()
+    with open(file_path, "rb") as f:
+        if size is None:
+            size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                md5_hash.update(mapped)
+        elif size > 0:
+            buffer = bytearray(min(size, HASH_BUFFER_SIZE))
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                md5_hash.update(view[:read])
+    return md5_hash.hexdigest()
+
+def _zero_copy(source_fd: int, destination_fd: int, size: int) -> bool:
+    """Copy size bytes inside the kernel with copy_file_range or sendfile, False if neither works here."""
+    for copy in (getattr(os, "copy_file_range", None), getattr(os, "sendfile", None)):
+        if copy is None:
+            continue
+        try:
+            copied = 0
+            while copied < size:
+                if copy is os.sendfile:
+                    sent = copy(destination_fd, source_fd, copied, size - copied)
+                else:
+                    sent = copy(source_fd, destination_fd, size - copied, copied, copied)
+                if sent == 0:
+                    break
+                copied += sent
+            if copied == size:
+                return True
+        except OSError:
+            pass
+        # Start over with the next method, sendfile moved the destination offset
+        os.ftruncate(destination_fd, 0)
+        os.lseek(destination_fd, 0, os.SEEK_SET)
+    return False
+
+def copy_with_md5(source: str, destination: str, md5: Optional[str] = None) -> str:
+    """
+    Copy source to destination and return its MD5, reading the source only once.
+    When md5 is already known the copy goes through the kernel's zero-copy path where available.
+    File times and mode are copied like shutil.copy2.
+    """
+    # Replace rather than overwrite, the destination may be a hard link into another folder
+    try:
+        os.remove(destination)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        # Read-only copy left by an earlier build, e.g. from a svn:needs-lock file
+        os.chmod(destination, 0o666)
+        os.remove(destination)
+
+    with open(source, "rb") as f, open(destination, "wb") as destination_file:
+        size = os.fstat(f.fileno()).st_size
+        if md5 is None or not _zero_copy(f.fileno(), destination_file.fileno(), size):
+            md5_hash = hashlib.md5()
+            buffer = bytearray(max(1, min(size, HASH_BUFFER_SIZE)))
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                md5_hash.update(view[:read])
+                destination_file.write(view[:read])
+            md5 = md5_hash.hexdigest()
+    shutil.copystat(source, destination)
+    return md5
+
+class ChecksumCache:
+    """
+    On-disk cache of file MD5 checksums keyed by (absolute path, size, mtime_ns).
+    A file is only hashed again when its size or modification time changes.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(cache_root(), CHECKSUM_DB_NAME)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10.0)
+
+    def lookup(self, stats: Dict[str, os.stat_result]) -> Dict[str, str]:
+        """Cached checksums of the files whose size and mtime still match, keyed by absolute path."""
+        found = {}
+        with self._lock, closing(self._connect()) as conn:
+            for path, stat in stats.items():
+                row = conn.execute("SELECT SIZE, MTIME_NS, MD5 FROM CHECKSUMS WHERE PATH = ?", (path,)).fetchone()
+                if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                    found[path] = row[2]
+            self.hits += len(found)
+            self.misses += len(stats) - len(found)
+        return found
+
+    def store(self, entries: Iterable[tuple]) -> None:
+        """Remember (absolute path, stat, md5) entries."""
+        try:
+            with self._lock, closing(self._connect()) as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO CHECKSUMS (PATH, SIZE, MTIME_NS, MD5) VALUES (?, ?, ?, ?)",
+                    [(path, stat.st_size, stat.st_mtime_ns, md5) for path, stat, md5 in entries]
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            # The cache is only an accelerator, a failed store must not fail the patch
+            print(f"Warning: Could not cache checksums: {e}")
+            log_error(f"Warning: Could not cache checksums: {e}")
+
+    def stats(self) -> str:
+        return f"Checksum cache hits: {self.hits}, misses: {self.misses}"
+
+_checksum_cache: Optional[ChecksumCache] = None
+_checksum_cache_lock = threading.Lock()
+
+def get_checksum_cache() -> Optional[ChecksumCache]:
+    """Get the shared checksum cache, or None if it is disabled or cannot be opened."""
+    global _checksum_cache
+    if not USE_CHECKSUM_CACHE:
+        return None
+    with _checksum_cache_lock:
+        if _checksum_cache is None:
+            try:
+                _checksum_cache = ChecksumCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Checksum cache disabled: {e}")
+                log_error(f"Warning: Checksum cache disabled: {e}")
+                return None
+        return _checksum_cache
+
+def _stat_files(files: Iterable[str]) -> Dict[str, tuple]:
+    """(absolute path, stat) of each readable file keyed by the path as given."""
+    found = {}
+    for file_path in files:
+        path = os.path.normcase(os.path.abspath(file_path))
+        try:
+            found[file_path] = (path, os.stat(path))
+        except OSError:
+            pass
+    return found
+
+def get_cached_md5_checksums(files: Iterable[str]) -> Dict[str, str]:
+    """Checksums of the unchanged files already in the checksum cache, keyed by the paths as given."""
+    cache = get_checksum_cache()
+    if cache is None:
+        return {}
+    stats = _stat_files(files)
+    checksums = cache.lookup(dict(stats.values()))
+    return {file_path: checksums[path] for file_path, (path, _) in stats.items() if path in checksums}
+
+def remember_md5_checksums(checksums: Dict[str, str]) -> None:
+    """Add checksums computed elsewhere, e.g. while copying, to the checksum cache."""
+    cache = get_checksum_cache()
+    if cache is None or not checksums:
+        return
+    stats = _stat_files(checksums)
+    cache.store((path, stat, checksums[file_path]) for file_path, (path, stat) in stats.items())
+
+def get_md5_checksums(files: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    MD5 checksums of files keyed by the paths as given.
+    Unchanged files come from the checksum cache, the others are hashed in parallel.
+    A file that cannot be read maps to None and the error is logged.
+    """
+    files = list(dict.fromkeys(files))
+    paths = {file_path: os.path.normcase(os.path.abspath(file_path)) for file_path in files}
+    stats: Dict[str, os.stat_result] = {}
+    for file_path, path in paths.items():
+        try:
+            stats[path] = os.stat(path)
+        except OSError as e:
+            print(f"Error calculating MD5 for {file_path}: {e}")
+            log_error(f"Error calculating MD5 for {file_path}: {e}")
+
+    cache = get_checksum_cache()
+    checksums = cache.lookup(stats) if cache is not None else {}
+
+    def hash_file(path):
+        try:
+            return md5_file(path, stats[path].st_size)
+        except Exception as e:
+            print(f"Error calculating MD5 for {path}: {e}")
+            log_error(f"Error calculating MD5 for {path}: {e}")
+            return None
+
+    missing = [path for path in stats if path not in checksums]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(HASH_WORKERS, len(missing))) as pool:
+            hashed = [(path, stats[path], md5) for path, md5 in zip(missing, pool.map(hash_file, missing)) if md5]
+        checksums.update((path, md5) for path, _, md5 in hashed)
+        if cache is not None and hashed:
+            cache.store(hashed)
+
+    return {file_path: checksums.get(path) for file_path, path in paths.items()}
@@ -2,11 +2,11 @@ import tkinter as tk
 from tkinter import messagebox
 from svn_operations import (
     lock_files, unlock_files, refresh_file_status_version,
-    view_file_native_diff, get_all_locked_files, get_file_info, refresh_locked_files
+    view_file_native_diff, iter_locked_files, get_file_info, refresh_locked_files
 )
 from patches_operations import (
     refresh_patches, remove_patch, view_files_from_patch,
-    build_patch, get_full_patch_info
+    build_patch, get_full_patch_info, refresh_patch_row
 )
 from config import load_config, log_error
 from buttons_function import next_version, view_selected_file_native_diff
@@ -298,17 +298,14 @@ class ContextMenuManager:
             # Clear the locked files treeview
             locked_files_treeview.delete(*locked_files_treeview.get_children())
             
-            # Get all locked files
-            locked_files = get_all_locked_files()
-            
             # Get existing files in main treeview
             existing_files = set()
             for item in main_treeview.get_children():
                 file_path = main_treeview.item(item, "values")[2]
                 existing_files.add(file_path)
             
-            # Add locked files not in main treeview
-            for file_path, revision, lock_date in locked_files:
+            # Add locked files not in main treeview as the scan streams them in
+            for file_path, revision, lock_date in iter_locked_files():
                 if file_path not in existing_files:
                     locked_files_treeview.insert(
                         "", "end",
@@ -396,11 +393,13 @@ class ContextMenuManager:
                     db.update_comment(int(patch_id), new_description)
                     db.conn.commit()
                     dialog.destroy()
-                    # Refresh the patches list
-                    self._refresh_patches(treeview)
+                    # Only the edited row needs reloading
+                    refresh_patch_row(treeview, patch_name)
                 except Exception as e:
                     db.conn.rollback()
                     messagebox.showerror("Error", f"Failed to save description:\n{e}")
+                finally:
+                    db.close()
             
             # Buttons frame
             btn_frame = tk.Frame(dialog)
@@ -308,8 +308,8 @@ def create_button_frame_patches(parent, patches_listbox, switch_to_modify_patch_
     patch_version_frame = tk.Frame(parent)
     patch_version_frame.pack(side="top", pady=5)
 
-    db = dbClass()
-    prefixes = db.get_prefix_list()
+    with dbClass() as db:
+        prefixes = db.get_prefix_list()
 
     patch_version_prefixe = ttk.Combobox(patch_version_frame, values=prefixes, width=3)
     patch_version_prefixe.set(config.get("patch_prefix", "S"))  # default value
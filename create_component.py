@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 from tkinterdnd2 import DND_FILES
 from typing import Callable
-from patches_operations import get_selected_patch, refresh_patches
+from patches_operations import get_selected_patch, refresh_patches, load_more_patches
 from buttons_function import select_all_rows, deselect_all_rows, handle_drop, remove_selected_patch,view_selected_file_native_diff,lock_selected_files, unlock_selected_files,modify_patch,build_existing_patch,view_patch_files
 from svn_operations import refresh_locked_files, refresh_file_status_version, lock_files, unlock_files
 from datetime import datetime
@@ -17,6 +17,9 @@ TREEVIEW_COLUMNS = [
     ("Date", 210),
 ]
 
+# Fraction of the patches list scrolled past before the next page is fetched
+LOAD_MORE_THRESHOLD = 0.9
+
 LISTBOX_COLUMNS = [
     ("Status", 60),
     ("Version", 60),
@@ -24,9 +27,10 @@ LISTBOX_COLUMNS = [
     ("Lock Date", 120),
 ]
 
-def add_scrollbars(widget: ttk.Treeview, parent: tk.Widget) -> None:
+def add_scrollbars(widget: ttk.Treeview, parent: tk.Widget) -> tuple:
     """
     Add vertical and horizontal scrollbars to a Treeview or Listbox widget.
+    Returns the (vertical, horizontal) scrollbars.
     """
     v_scrollbar = tk.Scrollbar(parent, orient="vertical", command=widget.yview)
     widget.configure(yscrollcommand=v_scrollbar.set)
@@ -35,6 +39,7 @@ def add_scrollbars(widget: ttk.Treeview, parent: tk.Widget) -> None:
     h_scrollbar = tk.Scrollbar(parent, orient="horizontal", command=widget.xview)
     widget.configure(xscrollcommand=h_scrollbar.set)
     h_scrollbar.pack(side="bottom", fill="x")
+    return v_scrollbar, h_scrollbar
 
 def refresh_patches_from_menu(listbox):
     """Refresh patches from context menu"""
@@ -69,7 +74,15 @@ def create_patches_treeview(parent: tk.Widget, switch_to_modify_patch_menu: Call
         treeview.heading(col_name, text=col_name)
         treeview.column(col_name, width=col_width, stretch=tk.NO)
     treeview.bind("<Button-1>", lambda event: deselect_all_rows(event, treeview))
-    add_scrollbars(treeview, parent)
+    v_scrollbar, _ = add_scrollbars(treeview, parent)
+
+    def on_yscroll(first, last):
+        v_scrollbar.set(first, last)
+        # Fetch the next page before the user reaches the last loaded row
+        if float(last) >= LOAD_MORE_THRESHOLD:
+            treeview.after_idle(load_more_patches, treeview)
+
+    treeview.configure(yscrollcommand=on_yscroll)
     context_menu_manager.create_patches_menu(treeview, switch_to_modify_patch_menu)  # Pass the callback
     
     treeview.pack(expand=True, fill="both")
@@ -104,7 +117,15 @@ def create_file_listbox(parent: tk.Widget, menu_name: str = "filebox") -> ttk.Tr
 def sort_treeview_column(treeview: ttk.Treeview, col: str, reverse: bool) -> None:
     """
     Sort the Treeview column.
+    The order is remembered as treeview.resort, so rows added later can be put back in it.
     """
+    _sort_rows(treeview, col, reverse)
+    treeview.resort = lambda: _sort_rows(treeview, col, reverse)
+
+    # Reverse the sorting order for the next click
+    treeview.heading(col, command=lambda: sort_treeview_column(treeview, col, not reverse))
+
+def _sort_rows(treeview: ttk.Treeview, col: str, reverse: bool) -> None:
     data = [(treeview.set(child, col), child) for child in treeview.get_children('')]
 
     # Sort by date if the column is "Lock Date"
@@ -116,9 +137,6 @@ def sort_treeview_column(treeview: ttk.Treeview, col: str, reverse: bool) -> Non
     for index, (_, child) in enumerate(data):
         treeview.move(child, '', index)
 
-    # Reverse the sorting order for the next click
-    treeview.heading(col, command=lambda: sort_treeview_column(treeview, col, not reverse))
-
 def parse_date(date_str: str) -> datetime:
     """
     Parse a date string into a datetime object. Return a default date if parsing fails.
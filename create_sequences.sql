@@ -0,0 +1,26 @@
+-- create_sequences.sql
+-- Key sequences used by db_handler.dbClass.allocate_ids and insert_returning_id (see ID_SEQUENCES in sql_catalog.py).
+-- Without them every new PATCH_HEADER, FILES or FOLDER key is read as MAX(key) + 1 under a table lock held until commit.
+-- Each sequence starts after the current highest key, existing sequences are left alone. Safe to run again.
+set serveroutput on
+
+DECLARE
+    PROCEDURE create_sequence(p_table VARCHAR2, p_column VARCHAR2, p_sequence VARCHAR2) IS
+        l_count NUMBER;
+        l_start NUMBER;
+    BEGIN
+        SELECT COUNT(*) INTO l_count FROM USER_SEQUENCES WHERE SEQUENCE_NAME = p_sequence;
+        IF l_count > 0 THEN
+            DBMS_OUTPUT.PUT_LINE(p_sequence || ' already exists');
+            RETURN;
+        END IF;
+        EXECUTE IMMEDIATE 'SELECT NVL(MAX(' || p_column || '), 0) + 1 FROM ' || p_table INTO l_start;
+        EXECUTE IMMEDIATE 'CREATE SEQUENCE ' || p_sequence || ' START WITH ' || l_start || ' INCREMENT BY 1 CACHE 20 NOCYCLE';
+        DBMS_OUTPUT.PUT_LINE(p_sequence || ' created, starting at ' || l_start);
+    END;
+BEGIN
+    create_sequence('PATCH_HEADER', 'PATCH_ID', 'PATCH_HEADER_SEQ');
+    create_sequence('FILES', 'FILE_ID', 'FILES_SEQ');
+    create_sequence('FOLDER', 'FOLDER_ID', 'FOLDER_SEQ');
+END;
+/
@@ -1,11 +1,15 @@
+import atexit
 import os
 import sys
-from typing import Optional, Dict, List, Any
+import threading
+from typing import Optional, Dict, List, Any, Tuple
 import oracledb
 from contextlib import contextmanager
 from datetime import datetime
 from tkinter import messagebox
 from config import log_error, load_config
+from sql_catalog import STATEMENTS, ID_SEQUENCES, IN_LIST_SIZES, STATEMENT_CACHE_SIZE
+from path_mapping import PathMapper
 
 class DatabaseError(Exception):
     """Custom exception for database operations."""
@@ -69,54 +73,247 @@ class DatabaseConnection:
             finally:
                 self._conn = None
 
+# Sessions are kept in one pool per DSN and borrowed by dbClass instances
+POOL_MIN = 1
+POOL_MAX = 8
+POOL_INCREMENT = 1
+# Seconds an idle pooled session may sit before it is pinged on acquire
+POOL_PING_INTERVAL = 60
+# Milliseconds to wait for a free session when every session is borrowed
+POOL_WAIT_TIMEOUT = 30000
+
+_pools: Dict[str, oracledb.ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_client_initialized = False
+
+def _instantclient_path() -> str:
+    # Detect if running inside compiled .exe
+    if getattr(sys, 'frozen', False):
+        # Running from PyInstaller bundle
+        base_path = sys._MEIPASS
+    else:
+        # Running from source
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, "instantclient_12_1")
+
+def _init_client() -> None:
+    """Load the Oracle client libraries once per process."""
+    global _client_initialized
+    if not _client_initialized:
+        oracledb.init_oracle_client(lib_dir=_instantclient_path())
+        _client_initialized = True
+
+def _dsn(dsn: Optional[str] = None) -> str:
+    return dsn or load_config().get("dsn_name", "CYFRAMEPROD")
+
+def get_pool(dsn: Optional[str] = None) -> oracledb.ConnectionPool:
+    """Get the session pool of a DSN, creating it on first use."""
+    dsn = _dsn(dsn)
+    with _pools_lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            _init_client()
+            pool = oracledb.create_pool(
+                user='DEV_TOOL',
+                password='DEV_TOOL',
+                dsn=dsn,
+                min=POOL_MIN,
+                max=POOL_MAX,
+                increment=POOL_INCREMENT,
+                ping_interval=POOL_PING_INTERVAL,
+                getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                wait_timeout=POOL_WAIT_TIMEOUT,
+                stmtcachesize=STATEMENT_CACHE_SIZE
+            )
+            _pools[dsn] = pool
+        return pool
+
+def reset_pool(dsn: Optional[str] = None) -> None:
+    """Close the pool of a DSN so the next borrow reconnects from scratch."""
+    dsn = _dsn(dsn)
+    with _pools_lock:
+        pool = _pools.pop(dsn, None)
+    if pool is not None:
+        try:
+            pool.close(force=True)
+        except oracledb.Error as e:
+            log_error(f"Failed to close session pool for {dsn}: {e}")
+
+def close_pools() -> None:
+    """Close every session pool, used when the application exits."""
+    with _pools_lock:
+        dsns = list(_pools)
+    for dsn in dsns:
+        reset_pool(dsn)
+
+atexit.register(close_pools)
+
+def acquire_connection(dsn: Optional[str] = None) -> oracledb.Connection:
+    """
+    Borrow a session from the pool of a DSN.
+    If the pool itself is broken (listener restart, network loss) it is
+    rebuilt once before giving up.
+    """
+    try:
+        return get_pool(dsn).acquire()
+    except oracledb.Error as e:
+        log_error(f"Session pool acquire failed, reconnecting: {e}")
+        reset_pool(dsn)
+        return get_pool(dsn).acquire()
+
+@contextmanager
+def borrow_connection(dsn: Optional[str] = None):
+    """Context manager that borrows a pooled session and gives it back on exit."""
+    conn = acquire_connection(dsn)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+# Rows fetched per round trip by execute_query
+QUERY_ARRAYSIZE = 500
+# Rows per page of the Patches List, fetched again as the user scrolls
+PATCH_PAGE_SIZE = 200
+
+def _in_binds(values: List[Any], prefix: str = "v"):
+    """
+    Yield (size, params) pairs binding values into IN lists of one of the
+    catalog's IN_LIST_SIZES, padded with NULL so the statement text stays the same.
+    """
+    largest = IN_LIST_SIZES[-1]
+    for i in range(0, len(values), largest):
+        chunk = list(values[i:i + largest])
+        size = next(size for size in IN_LIST_SIZES if size >= len(chunk))
+        chunk += [None] * (size - len(chunk))
+        yield size, {f"{prefix}{n}": value for n, value in enumerate(chunk)}
+
+_sequence_support: Dict[tuple, bool] = {}
+_sequence_support_lock = threading.Lock()
+
+def _rows_as_dicts(cursor) -> List[Dict]:
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+class ReferenceData:
+    """
+    In-memory copy of FOLDER, MODULE and CHECKLIST.
+    Loaded once per DSN by get_reference_data and dropped by refresh_reference_data,
+    which lookups call themselves when a key is missing.
+    """
+
+    def __init__(self, folders: List[Dict], modules: List[Dict], checklist: List[Dict]):
+        self.folders = folders
+        self.folder_ids = {}
+        for folder in folders:
+            if folder['SOFT_PATH'] is not None:
+                self.folder_ids.setdefault(folder['SOFT_PATH'], folder['FOLDER_ID'])
+        # Source -> patch folder layout, compiled once per load
+        self.path_mapper = PathMapper(folders)
+        self.modules = modules
+        self.module_map = {str(row['PREFIX']).strip(): str(row['APPLICATION_ID']).strip() for row in modules}
+        self.checklist = checklist
+
+    @classmethod
+    def load(cls, conn: oracledb.Connection) -> "ReferenceData":
+        with db_cursor(conn) as cursor:
+            out_cursors = {name: conn.cursor() for name in ("folders", "modules", "checklist")}
+            try:
+                cursor.execute(STATEMENTS["reference_data"], out_cursors)
+                return cls(**{name: _rows_as_dicts(out) for name, out in out_cursors.items()})
+            finally:
+                for out in out_cursors.values():
+                    out.close()
+
+_reference_data: Dict[str, ReferenceData] = {}
+_reference_data_lock = threading.Lock()
+
+def get_reference_data(dsn: Optional[str] = None, conn: Optional[oracledb.Connection] = None) -> ReferenceData:
+    """
+    The reference tables of a DSN, loaded on first use.
+    conn is used for the load when given, otherwise a pooled session is borrowed.
+    """
+    dsn = _dsn(dsn)
+    with _reference_data_lock:
+        reference_data = _reference_data.get(dsn)
+    if reference_data is not None:
+        return reference_data
+
+    if conn is not None:
+        reference_data = ReferenceData.load(conn)
+    else:
+        with borrow_connection(dsn) as pooled_conn:
+            reference_data = ReferenceData.load(pooled_conn)
+
+    with _reference_data_lock:
+        _reference_data[dsn] = reference_data
+    return reference_data
+
+def refresh_reference_data(dsn: Optional[str] = None) -> None:
+    """Forget the cached reference tables so the next lookup reloads them, call after writing to them."""
+    with _reference_data_lock:
+        _reference_data.pop(_dsn(dsn), None)
+
+def get_module_map(dsn: Optional[str] = None, conn: Optional[oracledb.Connection] = None) -> Dict[str, str]:
+    """The MODULE table as a PREFIX -> APPLICATION_ID dictionary."""
+    return get_reference_data(dsn, conn).module_map
+
+def get_application_id(prefix: str, dsn: Optional[str] = None, conn: Optional[oracledb.Connection] = None) -> str:
+    """The APPLICATION_ID of a patch prefix, reloading MODULE once if the prefix is not cached."""
+    prefix = str(prefix).strip()
+    application_id = get_module_map(dsn, conn).get(prefix)
+    if application_id is None:
+        # The prefix may have been added by someone else since the cache was loaded
+        refresh_reference_data(dsn)
+        application_id = get_module_map(dsn, conn).get(prefix)
+    if application_id is not None:
+        return application_id
+    else:
+        raise ValueError(f"Application ID '{prefix}' not found in the database.")
+
+def get_path_mapper(dsn: Optional[str] = None, conn: Optional[oracledb.Connection] = None) -> PathMapper:
+    """The FOLDER table compiled into the working copy -> patch folder path mapping."""
+    return get_reference_data(dsn, conn).path_mapper
+
 class dbClass:
+    """
+    Query helpers over a session borrowed from the shared pool.
+    Use it as a context manager, or call close(), to give the session back.
+    """
+
     def __init__(self):
         self.conn = None
         self.connect()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def connect(self):
-        instantclient_path = None
-        config = load_config()
         try:
-             # Detect if running inside compiled .exe
-            if getattr(sys, 'frozen', False):
-                # Running from PyInstaller bundle
-                base_path = sys._MEIPASS
-            else:
-                # Running from source
-                base_path = os.path.dirname(os.path.abspath(__file__))
-
-            instantclient_path = os.path.join(base_path, "instantclient_12_1")
-            
-            oracledb.init_oracle_client(lib_dir=instantclient_path)
-            self.conn = oracledb.connect(user='DEV_TOOL', password='DEV_TOOL', dsn=config.get("dsn_name", "CYFRAMEPROD"))
+            self.conn = acquire_connection()
         except oracledb.Error as e:
             messagebox.showerror("Database Error", f"Failed to connect to the database, Application will not work properly\n{e}")
             log_error(f"Database Error: {e}")
             log_error(f"Date: {datetime.now()}")
-            log_error(f"Instant Client Path: {instantclient_path}\n")
-            log_error(f"TNS_ADMIN: {os.environ['TNS_ADMIN']}\n")
+            log_error(f"Instant Client Path: {_instantclient_path()}\n")
+            log_error(f"TNS_ADMIN: {os.environ.get('TNS_ADMIN')}\n")
             log_error(f"------------------------------")
 
-        # config = load_config()
-        # hostname = config.get("db_host", "db04.intranet.cyframe.com")
-        # port = config.get("db_port", "1521")
-        # service_name = config.get("db_service", "CYFRAMEPROD")
-
-        # dsn = f"{hostname}:{port}/{service_name}"
-
-        # self.conn = oracledb.connect(
-        #     user=config.get("db_user", "DEV_TOOL"),
-        #     password=config.get("db_password", "DEV_TOOL"),
-        #     dsn=dsn
-        # )
-
     def close(self):
+        # Closing a pooled connection releases it back to its pool
         if self.conn:
-            self.conn.close()
+            try:
+                self.conn.close()
+            except oracledb.Error as e:
+                log_error(f"Failed to release database session: {e}")
+            finally:
+                self.conn = None
 
     def execute_query(self, sql: str, params: Optional[Dict] = None) -> List[Dict]:
         cursor = self.conn.cursor()
+        cursor.arraysize = QUERY_ARRAYSIZE
         cursor.execute(sql, params or {})
         columns = [col[0] for col in cursor.description]
         results = [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -128,85 +325,109 @@ class dbClass:
         cursor.execute(sql, params or {})
         cursor.close()
 
+    def has_sequence(self, table: str) -> bool:
+        """Whether the ID sequence of a table exists, checked once per DSN."""
+        sequence = ID_SEQUENCES[table][1]
+        key = (_dsn(), sequence)
+        with _sequence_support_lock:
+            supported = _sequence_support.get(key)
+        if supported is None:
+            result = self.execute_query(STATEMENTS["sequence_exists"], {'name': sequence})
+            supported = result[0]['COUNT'] > 0
+            with _sequence_support_lock:
+                _sequence_support[key] = supported
+        return supported
+
+    def allocate_ids(self, table: str, count: int = 1) -> List[int]:
+        """
+        Reserve count new keys for a table in one statement, to be handed out by the caller.
+        Uses the table's sequence, or MAX(key) under a table lock when there is none.
+        """
+        if count <= 0:
+            return []
+        if self.has_sequence(table):
+            return [row['ID'] for row in self.execute_query(STATEMENTS[f"next_ids.{table}"], {'count': count})]
+
+        # Blocks other sessions from inserting until our commit or rollback
+        self.execute_non_query(STATEMENTS[f"lock_ids.{table}"])
+        result = self.execute_query(STATEMENTS[f"max_id.{table}"])
+        first_id = result[0]['MAX_ID'] + 1
+        return list(range(first_id, first_id + count))
+
+    def insert_returning_id(self, table: str, statement: str, params: Dict) -> int:
+        """
+        Run a keyed INSERT from the statement catalog and return the new key.
+        The key comes from the table's sequence with RETURNING ... INTO when it exists.
+        """
+        params = dict(params)
+        if self.has_sequence(table):
+            sql = STATEMENTS[f"{statement}.sequence"]
+        else:
+            sql = STATEMENTS[f"{statement}.key"]
+            params['new_id_value'] = self.allocate_ids(table)[0]
+
+        cursor = self.conn.cursor()
+        try:
+            new_id = cursor.var(int)
+            params['new_id'] = new_id
+            cursor.execute(sql, params)
+            value = new_id.getvalue()
+            # DML returning yields one value per inserted row
+            return value[0] if isinstance(value, list) else value
+        finally:
+            cursor.close()
+
+    def get_reference_data(self) -> ReferenceData:
+        return get_reference_data(conn=self.conn)
+
     def get_folder_list(self):
-        sql = "SELECT PATH, DESCRIPTION, FOLDER_TYPE, SOFT_PATH, DEFAULT_PREFIX FROM FOLDER ORDER BY FOLDER_TYPE, PATH"
-        return self.execute_query(sql)
+        columns = ('PATH', 'DESCRIPTION', 'FOLDER_TYPE', 'SOFT_PATH', 'DEFAULT_PREFIX')
+        return [{column: folder[column] for column in columns} for folder in self.get_reference_data().folders]
 
     def add_folder(self, folder: str, description: str, folder_type: int):
-        sql = "INSERT INTO FOLDER (PATH, DESCRIPTION, FOLDER_TYPE) VALUES (:folder, :description, :folder_type)"
+        sql = STATEMENTS["add_folder"]
         self.execute_non_query(sql, {'folder': folder, 'description': description, 'folder_type': folder_type})
+        refresh_reference_data()
 
     def rename_folder(self, folder: str, description: str):
-        sql = "UPDATE FOLDER SET DESCRIPTION = :description WHERE PATH = :folder"
+        sql = STATEMENTS["rename_folder"]
         self.execute_non_query(sql, {'description': description, 'folder': folder})
+        refresh_reference_data()
 
     def get_file_list(self, folder: str):
-        sql = "SELECT FILE_ID, PATH, NAME, DELETED_YN FROM FILES WHERE PATH = :folder ORDER BY NAME"
+        sql = STATEMENTS["file_list"]
         return self.execute_query(sql, {'folder': folder})
 
     def add_file(self, folder: str, filename: str, folder_id: int, clean_path: str) -> int:
-        sql = "SELECT FILE_ID FROM FILES WHERE (PATH = :folder OR CLEAN_PATH = :clean_path) AND NAME = :filename"
+        sql = STATEMENTS["find_file"]
         result = self.execute_query(sql, {'folder': folder, 'clean_path': clean_path, 'filename': filename})
         if result:
             return result[0]['FILE_ID']
         else:
-            sql = "SELECT MAX(FILE_ID) AS MAX_ID FROM FILES"
-            result = self.execute_query(sql)
-            file_id = (result[0]['MAX_ID'] or 0) + 1
-            sql = "INSERT INTO FILES (FILE_ID, PATH, NAME, DELETED_YN, FOLDER_ID, CLEAN_PATH) VALUES (:file_id, :folder, :filename, 'N', :folder_id, :clean_path)"
-            self.execute_non_query(sql, {'file_id': file_id, 'folder': folder, 'filename': filename, 'folder_id': folder_id, 'clean_path': clean_path})
-            return file_id
+            return self.insert_returning_id("FILES", "add_file", {'folder': folder, 'filename': filename, 'folder_id': folder_id, 'clean_path': clean_path})
 
     def get_file_patch_list(self, folder: str, name: str):
-        sql = """
-        SELECT F.FILE_ID, F.PATH, F.NAME, F.DELETED_YN, H.NAME AS PATCH_NAME, D.VERSION
-        FROM FILES F, PATCH_DETAIL D, PATCH_HEADER H
-        WHERE F.FILE_ID = D.FILE_ID
-        AND D.PATCH_ID = H.PATCH_ID
-        AND F.PATH = :folder
-        AND F.NAME = :name
-        AND H.TEMP_YN = 'N'
-        AND H.DELETED_YN = 'N'
-        ORDER BY D.VERSION DESC
-        """
+        sql = STATEMENTS["file_patch_list"]
         return self.execute_query(sql, {'folder': folder, 'name': name})
 
     def get_folder_patch_list(self, folder: str):
-        sql = """
-        SELECT F.FILE_ID, F.PATH, F.NAME, F.DELETED_YN, H.NAME AS PATCH_NAME, D.VERSION, D.MD5_CHECKSUM
-        FROM FILES F, PATCH_DETAIL D, PATCH_HEADER H
-        WHERE F.FILE_ID = D.FILE_ID
-        AND D.PATCH_ID = H.PATCH_ID
-        AND F.PATH = :folder
-        AND H.TEMP_YN = 'N'
-        AND H.DELETED_YN = 'N'
-        ORDER BY D.VERSION DESC
-        """
+        sql = STATEMENTS["folder_patch_list"]
         return self.execute_query(sql, {'folder': folder})
     
     def get_folder_patch_list_new(self, folder: str):
-        sql = """
-        SELECT F.FILE_ID, F.PATH, F.NAME, F.DELETED_YN, H.NAME AS PATCH_NAME, D.VERSION, D.MD5_CHECKSUM
-        FROM FILES F, PATCH_DETAIL D, PATCH_HEADER H
-        WHERE F.FILE_ID = D.FILE_ID
-        AND D.PATCH_ID = H.PATCH_ID
-        AND F.CLEAN_PATH = :folder
-        AND H.TEMP_YN = 'N'
-        AND H.DELETED_YN = 'N'
-        ORDER BY D.VERSION DESC
-        """
+        sql = STATEMENTS["folder_patch_list_new"]
         return self.execute_query(sql, {'folder': folder})
 
-    def create_patch_header(self, patch_prefixe:str , patch_version:str, patch_desc: str, username: str, personal: bool, major:int, minor:int, revision:int) -> int:
-        sql = "SELECT MAX(PATCH_ID) AS MAX_ID FROM PATCH_HEADER"
-        result = self.execute_query(sql)
-        patch_id = (result[0]['MAX_ID'] or 0) + 1
-        sql = """
-        INSERT INTO PATCH_HEADER (PATCH_ID, NAME, COMMENTS, TEMP_YN, USER_ID, APPLICATION_ID, MAJOR, MINOR, REVISION)
-        VALUES (:patch_id, :patch_name, :comments, :temp_yn, :user_id, :application_id, :major, :minor, :revision)
+    def get_patch_dependencies(self, patch_id: int):
+        """
+        Names of the earlier patches each file of a patch depends on: every
+        non-temp, non-deleted patch holding the same file at a lower version.
         """
-        self.execute_non_query(sql, {
-            'patch_id': patch_id,
+        sql = STATEMENTS["patch_dependencies"]
+        return [row['PATCH_NAME'] for row in self.execute_query(sql, {'patch_id': patch_id})]
+
+    def create_patch_header(self, patch_prefixe:str , patch_version:str, patch_desc: str, username: str, personal: bool, major:int, minor:int, revision:int) -> int:
+        return self.insert_returning_id("PATCH_HEADER", "create_patch_header", {
             'patch_name': patch_prefixe + patch_version,
             'comments': patch_desc,
             'temp_yn': 'Y' if personal else 'N',
@@ -216,14 +437,10 @@ class dbClass:
             'minor': minor,
             'revision': revision
         })
-        return patch_id
     
 
     def update_patch_header(self, patch_id: int, patch_version_prefixe: str, patch_version: str,comments: str) -> int:
-        sql = """
-        UPDATE PATCH_HEADER SET NAME = :patch_name, COMMENTS = :comments, CREATION_DATE = SYSDATE
-        WHERE PATCH_ID = :patch_id
-        """
+        sql = STATEMENTS["update_patch_header"]
         self.execute_non_query(sql, {'patch_name': patch_version_prefixe + patch_version, 'comments': comments, 'patch_id': patch_id})
         # sql = "DELETE FROM PATCH_DETAIL WHERE PATCH_ID = :patch_id"
         # self.execute_non_query(sql, {'patch_id': patch_id})
@@ -231,143 +448,185 @@ class dbClass:
 
     def delete_patch_detail(self, patch_id: int):
         #delete patch detail
-        sql = "DELETE FROM PATCH_DETAIL WHERE PATCH_ID = :patch_id"
+        sql = STATEMENTS["delete_patch_detail"]
         self.execute_non_query(sql, {'patch_id': patch_id})
 
     def update_comment(self, patch_id: int, comments: str):
-        sql = "UPDATE PATCH_HEADER SET COMMENTS = :comments WHERE PATCH_ID = :patch_id"
+        sql = STATEMENTS["update_comment"]
         self.execute_non_query(sql, {'comments': comments, 'patch_id': patch_id})
 
     def create_patch_detail(self, patch_id: int, folder: str, clean_path:str, name: str, version: int, folder_id: int):
         file_id = self.add_file(folder, name, folder_id, clean_path)
-        sql = "INSERT INTO PATCH_DETAIL (PATCH_ID, FILE_ID, VERSION) VALUES (:patch_id, :file_id, :version)"
+        sql = STATEMENTS["create_patch_detail"]
         self.execute_non_query(sql, {'patch_id': patch_id, 'file_id': file_id, 'version': version})
         return file_id
     
+    def create_patch_details(self, patch_id: int, details: List[Dict]) -> Dict[tuple, int]:
+        """
+        Bulk version of create_patch_detail and set_md5 for a whole patch.
+        details are dictionaries with the keys folder, clean_path, name, version,
+        soft_path and md5. FOLDER_IDs and existing FILE_IDs are resolved with
+        array-bound lookups, then missing FILES and every PATCH_DETAIL row are
+        inserted with executemany in the caller's transaction.
+        Returns a dictionary mapping (folder, name) to FILE_ID.
+        """
+        if not details:
+            return {}
+
+        # FOLDER_ID of every soft path
+        folder_ids = {soft_path: self.get_folder_id(soft_path) for soft_path in {detail['soft_path'] for detail in details}}
+
+        # Existing FILE_IDs, matched on PATH or CLEAN_PATH like add_file
+        candidates = {}
+        for size, params in _in_binds(sorted({detail['name'] for detail in details})):
+            for row in self.execute_query(STATEMENTS[f"files_by_name.{size}"], params):
+                candidates.setdefault((row['NAME'], row['PATH']), row['FILE_ID'])
+                candidates.setdefault((row['NAME'], row['CLEAN_PATH']), row['FILE_ID'])
+
+        file_ids = {}
+        new_files = {}
+        for detail in details:
+            key = (detail['folder'], detail['name'])
+            if key in file_ids or key in new_files:
+                continue
+            file_id = candidates.get((detail['name'], detail['folder'])) or candidates.get((detail['name'], detail['clean_path']))
+            if file_id is None:
+                new_files[key] = detail
+            else:
+                file_ids[key] = file_id
+
+        cursor = self.conn.cursor()
+        try:
+            if new_files:
+                # One block of keys for every new file
+                new_ids = self.allocate_ids("FILES", len(new_files))
+                rows = []
+                for detail, file_id in zip(new_files.values(), new_ids):
+                    file_ids[(detail['folder'], detail['name'])] = file_id
+                    rows.append({
+                        'file_id': file_id,
+                        'folder': detail['folder'],
+                        'filename': detail['name'],
+                        'folder_id': folder_ids[detail['soft_path']],
+                        'clean_path': detail['clean_path']
+                    })
+                cursor.executemany(STATEMENTS["add_files"], rows)
+
+            cursor.executemany(
+                STATEMENTS["create_patch_details"],
+                [{
+                    'patch_id': patch_id,
+                    'file_id': file_ids[(detail['folder'], detail['name'])],
+                    'version': detail['version'],
+                    'checksum': detail['md5']
+                } for detail in details]
+            )
+        finally:
+            cursor.close()
+        return file_ids
+
     def get_folder_id(self, folder: str) -> int:
-        sql = "SELECT FOLDER_ID FROM FOLDER WHERE SOFT_PATH = :folder"
-        result = self.execute_query(sql, {'folder': folder})
-        if result:
-            return result[0]['FOLDER_ID']
+        folder_id = self.get_reference_data().folder_ids.get(folder)
+        if folder_id is None:
+            # The folder may have been created by someone else since the cache was loaded
+            refresh_reference_data()
+            folder_id = self.get_reference_data().folder_ids.get(folder)
+        if folder_id is not None:
+            return folder_id
         else:
             raise ValueError(f"Folder ID for '{folder}' not found.")
 
     def get_patch_list(self, temp_yn: bool, application_id: str):
-        sql = """
-        SELECT H.PATCH_ID, H.NAME, H.COMMENTS, DECODE(D.PATCH_ID, NULL, 0, COUNT(*)) AS PATCH_SIZE, H.USER_ID, H.CREATION_DATE,
-        CHECKLIST_COUNT(H.PATCH_ID) AS CHECK_LIST_COUNT
-        FROM PATCH_HEADER H, PATCH_DETAIL D
-        WHERE H.PATCH_ID = D.PATCH_ID (+)
-        AND DELETED_YN = 'N'
+        sql = STATEMENTS["patch_list"]
+        return self.execute_query(sql, {
+            'temp_yn': 'Y' if temp_yn else 'N',
+            'application_id': self.get_application_id(application_id)
+        })
+
+    def get_patch_list_page(self, temp_yn: bool, application_id: str, after_id: Optional[int] = None,
+                            page_size: int = PATCH_PAGE_SIZE):
         """
-        sql += f"AND TEMP_YN = '{'Y' if temp_yn else 'N'}'"
-        sql += f"AND APPLICATION_ID = '{self.get_application_id(application_id)}'"
+        Get the next page of the patch list, newest first.
+        after_id is the last PATCH_ID of the previous page, or None for the first page.
+        """
+        sql = STATEMENTS["patch_list_page"]
+        return self.execute_query(sql, {
+            'temp_yn': 'Y' if temp_yn else 'N',
+            'application_id': self.get_application_id(application_id),
+            'after_id': after_id,
+            'page_size': page_size
+        })
 
-        sql += """
-        GROUP BY H.PATCH_ID, D.PATCH_ID, H.NAME, H.COMMENTS, H.USER_ID, H.CREATION_DATE
-        ORDER BY PATCH_ID DESC
+    def get_current_scn(self) -> int:
+        """An SCN at or below the database's current one, to pass as since_scn later."""
+        return self.execute_query(STATEMENTS["current_scn"])[0]['SCN']
+
+    def get_patch_list_changes(self, temp_yn: bool, application_id: str, since_scn: int,
+                               lowest_patch_id: int, highest_patch_id: int) -> Tuple[List[Dict], int]:
         """
-        return self.execute_query(sql)
+        Get patch list headers changed after since_scn, from get_current_scn or a previous call.
+        Checklist changes are only looked for between lowest_patch_id and highest_patch_id.
+        Rows include DELETED_YN so deleted patches can be removed.
+        Returns the rows and the SCN to pass as since_scn on the next call.
+        """
+        # Read before the query, a change committed while it runs is seen again next time
+        next_scn = self.get_current_scn()
+        sql = STATEMENTS["patch_list_changes"]
+        result = self.execute_query(sql, {
+            'temp_yn': 'Y' if temp_yn else 'N',
+            'application_id': self.get_application_id(application_id),
+            'since_scn': since_scn,
+            'lowest_patch_id': lowest_patch_id,
+            'highest_patch_id': highest_patch_id
+        })
+        return result, next_scn
+
+    def get_patch_by_name(self, patch_name: str) -> Optional[Dict[str, Any]]:
+        """Get one patch with the same columns as the patch list, or None if it does not exist."""
+        result = self.execute_query(STATEMENTS["patch_by_name"], {'patch_name': patch_name})
+        return result[0] if result else None
 
     def get_patch_content(self, patch_id: int):
-        sql = """
-        SELECT DECODE(UPPER(SUBSTR(F.NAME, INSTR(F.NAME, '.', -1) + 1, 100), 'PKS', 0, 'PRC', 1, 'FNC', 2, 'PKB', 3, 4) AS FILE_ORDER,
-        D.PATCH_ID, D.FILE_ID, D.VERSION, F.PATH, F.NAME, F.DELETED_YN, H.COMMENTS, H.USER_ID, H.CREATION_DATE, D.MD5_CHECKSUM
-        FROM PATCH_DETAIL D, FILES F, PATCH_HEADER H
-        WHERE D.FILE_ID = F.FILE_ID
-        AND D.PATCH_ID = H.PATCH_ID
-        AND D.PATCH_ID = :patch_id
-        ORDER BY PATH, FILE_ORDER
-        """
+        sql = STATEMENTS["patch_content"]
         return self.execute_query(sql, {'patch_id': patch_id})
 
     def get_all_patch_content(self):
-        sql = """
-        SELECT DECODE(UPPER(SUBSTR(F.NAME, INSTR(F.NAME, '.', -1) + 1, 100), 'PKS', 0, 'PRC', 1, 'FNC', 2, 'PKB', 3, 4) AS FILE_ORDER,
-        D.PATCH_ID, D.FILE_ID, D.VERSION, F.PATH, F.NAME, F.DELETED_YN, H.COMMENTS, H.USER_ID, H.CREATION_DATE
-        FROM PATCH_DETAIL D, FILES F, PATCH_HEADER H
-        WHERE D.FILE_ID = F.FILE_ID
-        AND D.PATCH_ID = H.PATCH_ID
-        AND MD5_CHECKSUM IS NULL
-        AND H.DELETED_YN = 'N'
-        AND H.TEMP_YN = 'N'
-        ORDER BY H.PATCH_ID DESC, PATH, FILE_ORDER
-        """
+        sql = STATEMENTS["all_patch_content"]
         return self.execute_query(sql)
 
     def remove_patch(self, patch_id: int):
-        sql = "UPDATE PATCH_HEADER SET DELETED_YN = 'Y' WHERE PATCH_ID = :patch_id"
+        sql = STATEMENTS["remove_patch"]
         self.execute_non_query(sql, {'patch_id': patch_id})
     
     def remove_patch_detail(self, patch_id:int):
-        sql = "REMOVE FROM PATCH_DETAIL WHERE PATCH_ID = :patch_id"
+        sql = STATEMENTS["remove_patch_detail"]
         self.execute_non_query(sql, {'patch_id': patch_id})
 
     def rename_patch(self, patch_id: int, new_name: str):
-        sql = "UPDATE PATCH_HEADER SET NAME = :new_name WHERE PATCH_ID = :patch_id"
+        sql = STATEMENTS["rename_patch"]
         self.execute_non_query(sql, {'new_name': new_name, 'patch_id': patch_id})
 
+    def get_module_map(self) -> Dict[str, str]:
+        return self.get_reference_data().module_map
+
     def get_application_id(self, application_id: str) -> str:
-        sql = f"SELECT APPLICATION_ID FROM MODULE WHERE PREFIX = '{application_id}'"
-        result = self.execute_query(sql)
-        if result:
-            return str(result[0]['APPLICATION_ID']).strip()
-        else:
-            raise ValueError(f"Application ID '{application_id}' not found in the database.")
+        return get_application_id(application_id, conn=self.conn)
 
     def get_max_version(self, application_id: str):
         application_id = self.get_application_id(application_id)
-        sql = f"SELECT MAJOR, MINOR FROM CURRENT_VERSION WHERE APPLICATION_ID = '{application_id}'"
-        result = self.execute_query(sql)
-        major, minor = (result[0]['MAJOR'], result[0]['MINOR']) if result else (1, 0)
-        sql = f"""
-        SELECT NVL(MAX(REVISION), 0) AS REVISION, NVL(MAX(MAJOR), :major) AS MAJOR, NVL(MAX(MINOR), :minor) AS MINOR
-        FROM PATCH_HEADER
-        WHERE DELETED_YN = 'N' AND TEMP_YN = 'N'
-        AND MAJOR = :major AND MINOR = :minor
-        AND APPLICATION_ID = '{application_id}'
-        """
-        return self.execute_query(sql, {'major': major, 'minor': minor})
+        sql = STATEMENTS["max_version"]
+        return self.execute_query(sql, {'application_id': application_id})
 
     def get_build_list(self, patch_id: int):
-        sql = """
-        SELECT DISTINCT PATH, NAME, VERSION
-        FROM FILES F, PATCH_DETAIL PD
-        WHERE F.FILE_ID = PD.FILE_ID
-        AND PATCH_ID = (SELECT MAX(PH.PATCH_ID)
-                        FROM PATCH_DETAIL PD2, PATCH_HEADER PH
-                        WHERE PD2.FILE_ID = PD.FILE_ID
-                        AND PD2.PATCH_ID = PH.PATCH_ID
-                        AND PH.TEMP_YN = 'N'
-                        AND PH.DELETED_YN = 'N'
-                        AND PH.PATCH_ID <= :patch_id)
-        AND DELETED_YN = 'N'
-        UNION
-        SELECT PATH, NAME, TO_NUMBER(NULL) AS VERSION
-        FROM FILES F
-        WHERE NOT EXISTS (SELECT * FROM PATCH_DETAIL PD, PATCH_HEADER PH
-                          WHERE F.FILE_ID = PD.FILE_ID
-                          AND PD.PATCH_ID = PH.PATCH_ID
-                          AND PH.TEMP_YN = 'N'
-                          AND PH.DELETED_YN = 'N'
-                          AND PH.PATCH_ID <= :patch_id)
-        AND DELETED_YN = 'N'
-        """
+        sql = STATEMENTS["build_list"]
         return self.execute_query(sql, {'patch_id': patch_id})
 
     def set_md5(self, patch_id: int, file_id: int, checksum: str):
-        sql = "UPDATE PATCH_DETAIL SET MD5_CHECKSUM = :checksum WHERE PATCH_ID = :patch_id AND FILE_ID = :file_id"
+        sql = STATEMENTS["set_md5"]
         self.execute_non_query(sql, {'checksum': checksum, 'patch_id': patch_id, 'file_id': file_id})
 
     def get_patch_file_list(self, patch_id: int):
-        sql = """
-        SELECT FOLDER_TYPE, SUBSTR(F.PATH, LENGTH(R.PATH) + 1) AS PATH, F.NAME, D.VERSION, D.PATCH_ID
-        FROM PATCH_DETAIL D, FILES F, FOLDER R
-        WHERE D.FILE_ID = F.FILE_ID
-        AND D.PATCH_ID = :patch_id
-        AND SUBSTR(F.PATH, 1, LENGTH(R.PATH)) = R.PATH
-        ORDER BY R.FOLDER_TYPE, F.PATH
-        """
+        sql = STATEMENTS["patch_file_list"]
 
         # SELECT F.PATH AS PATH, F.NAME, D.VERSION, D.PATCH_ID
         # FROM PATCH_DETAIL D, FILES F
@@ -378,63 +637,25 @@ class dbClass:
         return self.execute_query(sql, {'patch_id': patch_id})
     
     def get_patch_file_list_new(self, patch_id: int):
-        sql = """
-        SELECT R.FOLDER_TYPE,
-            CONCAT(F.CLEAN_PATH, F.NAME) AS PATH,
-            R.SVN_PATH as SVN_PATH,
-            F.NAME,
-            D.VERSION,
-            D.PATCH_ID
-        FROM PATCH_DETAIL D
-        JOIN FILES F ON D.FILE_ID = F.FILE_ID
-        JOIN FOLDER R 
-        ON (F.FOLDER_ID = R.FOLDER_ID 
-            OR SUBSTR(F.PATH, 1, LENGTH(R.PATH)) = R.PATH)
-        WHERE D.PATCH_ID = :patch_id
-        ORDER BY R.FOLDER_TYPE, F.PATH
-        """
+        sql = STATEMENTS["patch_file_list_new"]
         return self.execute_query(sql, {'patch_id': patch_id})
 
     def get_patch_doc_comment(self, patch_id: int):
-        sql = """
-        SELECT TRIM(NAME) AS NAME, USER_ID, '""' || REPLACE(COMMENTS, CHR(13) || CHR(10), CHR(10)) || '""' AS COMMENTS, PATCH_ID
-        FROM PATCH_HEADER
-        WHERE PATCH_ID >= :patch_id
-        AND DELETED_YN <> 'Y'
-        AND TEMP_YN = 'N'
-        ORDER BY PATCH_ID
-        """
+        sql = STATEMENTS["patch_doc_comment"]
         return self.execute_query(sql, {'patch_id': patch_id})
 
     def get_check_list(self, patch_id: int):
-        sql = """
-        SELECT P.PATCH_ID, P.FILE_ID, P.VERSION, F.CHECKLIST_ID, F.CREATION_DATE, D.ITEM_VALUE, FL.NAME AS FILENAME
-        FROM PATCH_CHECKLIST F, PATCH_CHECKLIST_DETAIL D, PATCH_DETAIL P, FILES FL
-        WHERE P.PATCH_ID = :patch_id
-        AND P.PATCH_ID = F.PATCH_ID (+)
-        AND P.FILE_ID = F.FILE_ID (+)
-        AND P.VERSION = F.VERSION (+)
-        AND F.CHECKLIST_ID = D.CHECKLIST_ID (+)
-        AND P.FILE_ID = FL.FILE_ID
-        """
+        sql = STATEMENTS["check_list"]
         return self.execute_query(sql, {'patch_id': patch_id})
 
     def get_check_item(self):
-        sql = "SELECT ITEM_ID, DISPLAY_ORDER, FILE_TYPE, ITEM_DESC, CONTENT_TYPE FROM CHECKLIST"
-        return self.execute_query(sql)
+        return [dict(item) for item in self.get_reference_data().checklist]
 
     def get_prefix_list(self):
-        sql = "SELECT PREFIX FROM MODULE"
-        list = self.execute_query(sql)
-        return [item['PREFIX'] for item in list]
+        return list(self.get_module_map())
     
     def check_patch_exists(self, patch_prefix: str, patch_version: str) -> bool:
-        sql = """
-        SELECT COUNT(*) AS COUNT
-        FROM PATCH_HEADER
-        WHERE NAME LIKE :patch_name
-        AND DELETED_YN = 'N'
-        """
+        sql = STATEMENTS["check_patch_exists"]
         result = self.execute_query(sql, {'patch_name': f"%{patch_prefix}{patch_version}%"})
         return result[0]['COUNT'] > 0
 
@@ -0,0 +1,187 @@
+# export_cache.py
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Optional
+from config import log_error
+
+# Set to False to always export from the repository
+USE_EXPORT_CACHE = True
+
+# Content of path@revision never changes in the repository, so exports can be reused across builds
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+CACHE_DIR_NAME = "export_cache"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS BLOBS (
+    DIGEST TEXT PRIMARY KEY,
+    SIZE INTEGER NOT NULL,
+    MTIME_NS INTEGER NOT NULL,
+    LAST_USED REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ENTRIES (
+    REPOS_PATH TEXT NOT NULL,
+    REVISION TEXT NOT NULL,
+    DIGEST TEXT NOT NULL,
+    PRIMARY KEY (REPOS_PATH, REVISION)
+);
+CREATE INDEX IF NOT EXISTS I_ENTRIES_DIGEST ON ENTRIES (DIGEST);
+CREATE INDEX IF NOT EXISTS I_BLOBS_LAST_USED ON BLOBS (LAST_USED);
+"""
+
+def cache_root() -> str:
+    """Folder holding every SVNManager cache."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "SVNManager")
+
+def default_cache_dir() -> str:
+    return os.path.join(cache_root(), CACHE_DIR_NAME)
+
+class ExportCache:
+    """
+    On-disk cache of exported file contents keyed by repository path and revision.
+    Contents are stored once per MD5 digest, and the least recently used blobs
+    are evicted when the cache grows over max_bytes.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES, use_hard_links: bool = True):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.use_hard_links = use_hard_links
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.cache_dir, "blobs"), exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, "index.db")
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self._index_path, timeout=10.0)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", digest[:2], digest)
+
+    def fetch(self, repos_path: str, revision: str, destination: str) -> bool:
+        """
+        Place the cached content of repos_path@revision at destination.
+        Returns False on a miss or when the cached blob no longer matches its index.
+        """
+        with self._lock, closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT B.DIGEST, B.SIZE, B.MTIME_NS FROM ENTRIES E JOIN BLOBS B ON B.DIGEST = E.DIGEST "
+                "WHERE E.REPOS_PATH = ? AND E.REVISION = ?",
+                (repos_path, str(revision))
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False
+
+            digest, size, mtime_ns = row
+            blob_path = self._blob_path(digest)
+            try:
+                stat = os.stat(blob_path)
+            except OSError:
+                stat = None
+            # A blob changed through a hard link is no longer trusted
+            if stat is None or stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                self._drop_blob(conn, digest)
+                conn.commit()
+                self.misses += 1
+                return False
+
+            conn.execute("UPDATE BLOBS SET LAST_USED = ? WHERE DIGEST = ?", (time.time(), digest))
+            conn.commit()
+            self.hits += 1
+
+        self._place(blob_path, destination)
+        return True
+
+    def store(self, repos_path: str, revision: str, source_file: str) -> None:
+        """Add the exported file at source_file as the content of repos_path@revision."""
+        try:
+            md5_hash = hashlib.md5()
+            with open(source_file, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    md5_hash.update(chunk)
+            digest = md5_hash.hexdigest()
+            blob_path = self._blob_path(digest)
+
+            with self._lock, closing(self._connect()) as conn:
+                if not os.path.exists(blob_path):
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+                    shutil.copyfile(source_file, temp_path)
+                    os.replace(temp_path, blob_path)
+                stat = os.stat(blob_path)
+                conn.execute(
+                    "INSERT OR REPLACE INTO BLOBS (DIGEST, SIZE, MTIME_NS, LAST_USED) VALUES (?, ?, ?, ?)",
+                    (digest, stat.st_size, stat.st_mtime_ns, time.time())
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO ENTRIES (REPOS_PATH, REVISION, DIGEST) VALUES (?, ?, ?)",
+                    (repos_path, str(revision), digest)
+                )
+                self._evict(conn)
+                conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            # The cache is only an accelerator, a failed store must not fail the export
+            print(f"Warning: Could not cache {repos_path}@{revision}: {e}")
+            log_error(f"Warning: Could not cache {repos_path}@{revision}: {e}")
+
+    def _place(self, blob_path: str, destination: str) -> None:
+        if os.path.lexists(destination):
+            os.remove(destination)
+        if self.use_hard_links:
+            try:
+                os.link(blob_path, destination)
+                return
+            except OSError:
+                pass  # Different volume or no hard link support, copy instead
+        shutil.copyfile(blob_path, destination)
+
+    def _drop_blob(self, conn, digest: str) -> None:
+        conn.execute("DELETE FROM ENTRIES WHERE DIGEST = ?", (digest,))
+        conn.execute("DELETE FROM BLOBS WHERE DIGEST = ?", (digest,))
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _evict(self, conn) -> None:
+        """Remove least recently used blobs until the cache fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(SIZE), 0) FROM BLOBS").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, size in conn.execute("SELECT DIGEST, SIZE FROM BLOBS ORDER BY LAST_USED").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._drop_blob(conn, digest)
+            total -= size
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return f"Cache hits: {self.hits}, misses: {self.misses} ({rate:.0f}% hit rate)"
+
+_export_cache: Optional[ExportCache] = None
+_export_cache_lock = threading.Lock()
+
+def get_export_cache() -> Optional[ExportCache]:
+    """Get the shared export cache, or None if it is disabled or the cache folder cannot be used."""
+    global _export_cache
+    if not USE_EXPORT_CACHE:
+        return None
+    with _export_cache_lock:
+        if _export_cache is None:
+            try:
+                _export_cache = ExportCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: Export cache disabled: {e}")
+                log_error(f"Warning: Export cache disabled: {e}")
+                return None
+        return _export_cache
@@ -0,0 +1,130 @@
+# export_pipeline.py
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from export_cache import get_export_cache
+from svn_executor import SvnExecutor, get_svn_executor
+
+@dataclass
+class ExportJob:
+    """One (path, revision) export, written to one or more destination files."""
+    source: str
+    revision: str
+    destinations: List[str] = field(default_factory=list)
+    # Repository URL of source, used as the export cache key
+    repos_url: Optional[str] = None
+
+@dataclass
+class ExportResult:
+    job: ExportJob
+    elapsed: float = 0.0
+    error: Optional[Exception] = None
+    cached: bool = False
+
+@dataclass
+class ExportReport:
+    """Outcome of an export run, with per-file timing and every failure."""
+    results: List[ExportResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def failures(self) -> List[ExportResult]:
+        return [result for result in self.results if result.error is not None]
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(1 for result in self.results if result.cached)
+
+    def summary(self, slowest: int = 10) -> str:
+        lines = [
+            f"Exports: {len(self.results)}",
+            f"Failed: {len(self.failures)}",
+            f"From cache: {self.cache_hits}",
+            f"Total time: {self.elapsed:.2f}s",
+        ]
+        cache = get_export_cache()
+        if cache is not None:
+            lines.append(cache.stats())
+        by_time = sorted(self.results, key=lambda result: result.elapsed, reverse=True)[:slowest]
+        if by_time:
+            lines.append("Slowest files:")
+            lines.extend(f"  {result.elapsed:.2f}s {result.job.source}@{result.job.revision}" for result in by_time)
+        return "\n".join(lines)
+
+    def failure_message(self) -> str:
+        return "\n".join(
+            f"{result.job.source} revision {result.job.revision}: {result.error}"
+            for result in self.failures
+        )
+
+def plan_exports(exports: List[Tuple[str, str, str]], repos_url_of: Optional[Callable[[str], Optional[str]]] = None) -> List[ExportJob]:
+    """
+    Turn (source, revision, destination_file) tuples into export jobs.
+    Each (source, revision) pair is exported once even when several
+    destinations need it, and repeated destinations are dropped.
+    repos_url_of maps a source to its repository URL so the job can use the export cache.
+    """
+    jobs: Dict[Tuple[str, str], ExportJob] = {}
+    seen_destinations = set()
+    for source, revision, destination in exports:
+        destination = os.path.normpath(destination)
+        if destination in seen_destinations:
+            continue
+        seen_destinations.add(destination)
+        key = (source, str(revision))
+        if key not in jobs:
+            jobs[key] = ExportJob(source, str(revision), repos_url=repos_url_of(source) if repos_url_of else None)
+        jobs[key].destinations.append(destination)
+    return list(jobs.values())
+
+def export_file_version(executor: SvnExecutor, source: str, revision: str, destination: str,
+                        cwd: Optional[str] = None, repos_url: Optional[str] = None) -> bool:
+    """
+    Export source at revision to the destination file with `svn export`.
+    When repos_url is given the export cache is checked first and filled after a miss.
+    Returns True if the file came from the cache.
+    """
+    cache = get_export_cache() if repos_url else None
+    if cache is not None and cache.fetch(repos_url, revision, destination):
+        return True
+
+    args = ["svn", "export", "-r", str(revision), "--force", source, destination]
+    result = executor.run(args, cwd=cwd)
+    if result.returncode != 0:
+        raise Exception(f"SVN export failed: {result.stderr}")
+
+    if cache is not None:
+        cache.store(repos_url, revision, destination)
+    return False
+
+def run_exports(jobs: List[ExportJob], cwd: Optional[str] = None, max_workers: Optional[int] = None) -> ExportReport:
+    """
+    Run export jobs concurrently and collect timing and failures for all of them.
+    Destination folders are created in one pass before any export starts.
+    max_workers overrides the shared svn executor's parallelism for this run.
+    """
+    for directory in {os.path.dirname(destination) for job in jobs for destination in job.destinations}:
+        os.makedirs(directory, exist_ok=True)
+
+    owns_executor = bool(max_workers)
+    executor = SvnExecutor(max_workers=max_workers) if owns_executor else get_svn_executor()
+
+    def run_job(job: ExportJob) -> ExportResult:
+        start = time.perf_counter()
+        try:
+            cached = export_file_version(executor, job.source, job.revision, job.destinations[0], cwd=cwd, repos_url=job.repos_url)
+            for destination in job.destinations[1:]:
+                shutil.copy2(job.destinations[0], destination)
+            return ExportResult(job, time.perf_counter() - start, cached=cached)
+        except Exception as e:
+            return ExportResult(job, time.perf_counter() - start, e)
+
+    start = time.perf_counter()
+    try:
+        results = executor.map(run_job, jobs)
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    return ExportReport(results, time.perf_counter() - start)
@@ -0,0 +1,177 @@
+# patch_manifest.py
+import json
+import os
+import stat
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from config import log_error
+from path_mapping import PathMapper, PathMapping
+
+MANIFEST_NAME = ".patch_manifest.json"
+MANIFEST_VERSION = 1
+
+# Categories of PatchFile
+WEB = "web"
+DATABASE = "db"
+DLL = "dll"
+CGI = "cgi"
+OTHER = "other"
+
+# Category of the files of each FOLDER_TYPE
+FOLDER_CATEGORIES = {'1': WEB, '2': DATABASE, '3': DLL, '4': CGI}
+
+@dataclass
+class PatchFile:
+    """
+    One file of a patch, classified once and read by every artifact writer:
+    the patch files copy, PATCH_DETAIL rows, ReadMe.txt, MainSQL.sql and the folder manifest.
+    """
+    # Path relative to the working copy root
+    source: str
+    category: str
+    # Path inside the patch folder, empty for files that are not shipped
+    destination: str = ""
+    # Schema folder under Database, for database files
+    schema: str = ""
+    revision: str = ""
+    md5: Optional[str] = None
+
+def _patch_file(source: str, mapping: Optional[PathMapping], revision) -> PatchFile:
+    if mapping is None:
+        return PatchFile(source, OTHER, revision=str(revision))
+    category = FOLDER_CATEGORIES[mapping.folder_type]
+    schema = mapping.subfolder if category == DATABASE else ""
+    return PatchFile(source, category, mapping.destination, schema=schema, revision=str(revision))
+
+def classify_selected_file(file: str, mapper: PathMapper, relative_path: str = "", revision="") -> PatchFile:
+    """Classify a working copy file selected for a patch, relative_path being the svn_path folder."""
+    return _patch_file(file, mapper.map(file, relative_path), revision)
+
+def classify_patch_row(row: Dict, mapper: PathMapper) -> PatchFile:
+    """Classify a file of a stored patch, from a dbClass.get_patch_file_list_new row."""
+    return _patch_file(row["PATH"], mapper.map_in_folder(row["FOLDER_TYPE"], row["SVN_PATH"], row["PATH"]), row["VERSION"])
+
+class PatchManifest:
+    """
+    Record of the files materialized in a patch folder.
+    Each entry maps a destination path, relative to the folder, to the repository
+    path and revision it was produced from, its MD5, and the size and mtime it was
+    written with, so unchanged files are left alone on the next generate, update or build.
+    With a base_folder the manifest describes that folder while new files are written
+    to folder: files not rewritten are looked up in base_folder, see PatchFolderStage.
+    """
+
+    def __init__(self, patch_version_folder: str, base_folder: Optional[str] = None):
+        self.folder = patch_version_folder
+        self.path = os.path.join(patch_version_folder, MANIFEST_NAME)
+        self.base_folder = base_folder
+        self.files: Dict[str, dict] = {}
+        self.tools_exported = False
+        self.exists = False
+        source_path = os.path.join(base_folder, MANIFEST_NAME) if base_folder else self.path
+        try:
+            with open(source_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.files = data.get("files", {})
+                self.tools_exported = data.get("tools_exported", False)
+                self.exists = True
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            # An unreadable manifest only costs a full rebuild of the folder
+            print(f"Warning: Ignoring patch manifest {source_path}: {e}")
+            log_error(f"Warning: Ignoring patch manifest {source_path}: {e}")
+        if not self.exists:
+            # Nothing in a base folder without a manifest can be trusted
+            self.base_folder = None
+
+    @staticmethod
+    def key(destination: str) -> str:
+        return destination.replace("\\", "/")
+
+    def locate(self, destination: str) -> Optional[str]:
+        """Path of the current copy of destination, written to folder or kept in base_folder."""
+        for folder in (self.folder, self.base_folder):
+            if folder is not None and os.path.exists(os.path.join(folder, destination)):
+                return os.path.join(folder, destination)
+        return None
+
+    def current_md5(self, destination: str, source: str, revision) -> Optional[str]:
+        """MD5 of destination if it is already source@revision and unchanged on disk, else None."""
+        entry = self.files.get(self.key(destination))
+        if entry is None or entry["source"] != source or entry["revision"] != str(revision):
+            return None
+        file_path = self.locate(destination)
+        if file_path is None:
+            return None
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return None
+        if file_stat.st_size != entry["size"] or file_stat.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        return entry["md5"]
+
+    def record(self, destination: str, source: str, revision, md5: str) -> None:
+        """Remember that destination was just written from source@revision."""
+        file_stat = os.stat(os.path.join(self.folder, destination))
+        self.files[self.key(destination)] = {
+            "source": source,
+            "revision": str(revision),
+            "md5": md5,
+            "size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns
+        }
+
+    def remove_stale(self, destinations: Iterable[str]) -> list:
+        """Delete the recorded files that are no longer part of the patch, returning their paths."""
+        keep = {self.key(destination) for destination in destinations}
+        removed = [destination for destination in self.files if destination not in keep]
+        for destination in removed:
+            del self.files[destination]
+            file_path = os.path.join(self.folder, destination)
+            unlink_if_exists(file_path)
+            # Drop directories left empty, up to the patch folder
+            directory = os.path.dirname(file_path)
+            while os.path.normpath(directory) != os.path.normpath(self.folder):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+        return removed
+
+    def save(self) -> None:
+        data = {"version": MANIFEST_VERSION, "tools_exported": self.tools_exported, "files": self.files}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self.exists = True
+
+def unlink_if_exists(file_path: str) -> None:
+    """
+    Remove a file before it is rewritten, so a hard link shared with another folder,
+    such as an export cache blob, is replaced instead of written through. Read-only files are made writable first.
+    """
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        os.chmod(file_path, stat.S_IWRITE | stat.S_IREAD)
+        os.remove(file_path)
+
+def write_text_if_changed(file_path: str, content: str) -> bool:
+    """Write a generated text file unless it already holds content. Returns True if written."""
+    try:
+        with open(file_path, "r") as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    unlink_if_exists(file_path)
+    with open(file_path, "w") as f:
+        f.write(content)
+    return True
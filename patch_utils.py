@@ -1,21 +1,26 @@
-import hashlib
 from tkinter import messagebox
 import shutil
 import os
-from svn_operations import copy_InstallConfig, copy_RunScript, copy_UnderTestInstallConfig, get_file_revision, get_file_revision_batch, get_file_head_revision, get_file_head_revision_batch, get_relative_path
-from db_handler import dbClass
+from svn_operations import copy_InstallConfig, copy_RunScript, copy_UnderTestInstallConfig, get_file_revision, get_file_revision_batch, get_file_head_revision_batch, get_wc_context
+from db_handler import get_module_map, get_application_id, get_path_mapper
+from checksum_cache import md5_file, get_md5_checksums, get_cached_md5_checksums, remember_md5_checksums, copy_with_md5
+from patch_manifest import (
+    PatchManifest, MANIFEST_NAME, WEB, DATABASE, DLL, CGI, classify_selected_file, classify_patch_row,
+    write_text_if_changed, unlink_if_exists
+)
+from svn_executor import get_svn_executor
+import threading
 import time
+import uuid
 from config import log_error, load_config
 
+# Tools exported into every patch folder by setup_patch_folder
+TOOL_FILES = ["InstallConfig.exe", "RunScript.bat", "UNDERTEST_InstallConfig.exe"]
+
 def get_md5_checksum(file_path):
     """Returns the MD5 checksum of a given file."""
-    md5_hash = hashlib.md5()
-    
     try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):  # Read in chunks of 4KB
-                md5_hash.update(chunk)
-        return md5_hash.hexdigest()
+        return md5_file(file_path)
     except Exception as e:
         raise Exception(f"Error calculating MD5 checksum for {file_path}: {e}")
     
@@ -61,48 +66,208 @@ def cleanup_files(patch_version_folder):
                 print(f"Warning: Could not fully clean up {patch_version_folder}: {e}")
                 log_error(f"Warning: Could not fully clean up {patch_version_folder}: {e}")
 
+# Folders being deleted by discard_in_background
+_discarding = set()
+_discarding_lock = threading.Lock()
+
+def discard_in_background(folder):
+    """Delete a folder on a background thread so slow deletes never block the caller."""
+    folder = os.path.normpath(folder)
+    with _discarding_lock:
+        if folder in _discarding:
+            return
+        _discarding.add(folder)
+
+    def discard():
+        try:
+            cleanup_files(folder)
+        finally:
+            with _discarding_lock:
+                _discarding.discard(folder)
+
+    threading.Thread(target=discard, name="patch-discard", daemon=True).start()
+
+# Staging and replaced folders older than this are leftovers of interrupted runs
+STALE_STAGE_AGE = 6 * 3600  # seconds
+
+# Staging folders of the runs in this process, never swept
+_active_stages = set()
+_active_stages_lock = threading.Lock()
+
+def _stage_age(parent, entry, prefix):
+    """Seconds since a staging or replaced folder was created, from the time in its name."""
+    try:
+        created = int(entry[len(prefix):].split("-")[0])
+    except ValueError:
+        # Named by an older version, fall back to the folder's modification time
+        try:
+            created = os.path.getmtime(os.path.join(parent, entry))
+        except OSError:
+            return 0
+    return time.time() - created
+
+class PatchFolderStage:
+    """
+    Builds a patch folder in a sibling staging directory on the same volume and
+    moves it into place with a rename on commit. The patch folder is never left half
+    written: a failed build only discards the staging directory, and discard after
+    commit puts the replaced folder back until finish deletes it.
+    Only new and changed files are written to the staging directory. Files the
+    manifest shows as unchanged stay in the patch folder until commit, which renames
+    them into the staging directory, so nothing is copied and no hard links are needed.
+    """
+
+    def __init__(self, patch_version_folder):
+        self.target = os.path.normpath(patch_version_folder)
+        parent, name = os.path.split(self.target)
+        os.makedirs(parent, exist_ok=True)
+        # Leftovers of interrupted runs, old enough not to belong to a run still going
+        with _active_stages_lock:
+            active = set(_active_stages)
+        for prefix in (f".{name}.staging-", f".{name}.old-"):
+            for entry in os.listdir(parent):
+                entry_path = os.path.normpath(os.path.join(parent, entry))
+                if (entry.startswith(prefix) and entry_path not in active
+                        and _stage_age(parent, entry, prefix) > STALE_STAGE_AGE):
+                    discard_in_background(entry_path)
+        self._parent, self._name = parent, name
+        self.folder = os.path.join(parent, f".{name}.staging-{int(time.time())}-{uuid.uuid4().hex[:8]}")
+        self.manifest = None
+        # Files moved in and the replaced folder, between commit and finish
+        self._committed = None
+        os.makedirs(self.folder)
+        with _active_stages_lock:
+            _active_stages.add(self.folder)
+
+    def open_manifest(self):
+        """Manifest of the current patch folder, with new files going to the staging directory."""
+        self.manifest = PatchManifest(self.folder, self.target)
+        return self.manifest
+
+    def _kept_files(self):
+        """Files of the patch folder the manifest keeps and that were not rewritten."""
+        if self.manifest is None or self.manifest.base_folder is None:
+            return []
+        names = list(self.manifest.files)
+        if self.manifest.tools_exported:
+            names += TOOL_FILES
+        return [name for name in names
+                if not os.path.exists(os.path.join(self.folder, name)) and os.path.exists(os.path.join(self.target, name))]
+
+    def _move_files(self, names, source, destination):
+        """Rename files between folders, moving them all back if one fails."""
+        moved = []
+        try:
+            for name in names:
+                os.makedirs(os.path.dirname(os.path.join(destination, name)), exist_ok=True)
+                os.rename(os.path.join(source, name), os.path.join(destination, name))
+                moved.append(name)
+        except OSError:
+            self._return_files(moved, destination, source)
+            raise
+        return moved
+
+    def _return_files(self, names, source, destination):
+        for name in names:
+            try:
+                os.rename(os.path.join(source, name), os.path.join(destination, name))
+            except OSError as e:
+                print(f"Warning: Could not move {name} back to {destination}: {e}")
+                log_error(f"Warning: Could not move {name} back to {destination}: {e}")
+
+    def commit(self):
+        """
+        Move the unchanged files into the staged folder, then the staged folder into place.
+        On failure everything is moved back and the patch folder is left as it was.
+        The replaced folder is kept until finish, so discard can still put it back
+        if the database transaction recording the patch fails.
+        """
+        kept = self._move_files(self._kept_files(), self.target, self.folder)
+        old_folder = os.path.join(self._parent, f".{self._name}.old-{int(time.time())}-{uuid.uuid4().hex[:8]}")
+        replaced = os.path.exists(self.target)
+        with _active_stages_lock:
+            _active_stages.add(old_folder)
+        try:
+            if replaced:
+                os.rename(self.target, old_folder)
+            try:
+                os.rename(self.folder, self.target)
+            except OSError:
+                if replaced:
+                    os.rename(old_folder, self.target)
+                raise
+        except OSError:
+            self._return_files(kept, self.folder, self.target)
+            with _active_stages_lock:
+                _active_stages.discard(old_folder)
+            raise
+        self._committed = (kept, old_folder, replaced)
+
+    def finish(self):
+        """Delete the replaced folder in the background, call once the database is committed."""
+        if self._committed is not None:
+            _, old_folder, replaced = self._committed
+            self._committed = None
+            with _active_stages_lock:
+                _active_stages.discard(old_folder)
+            if replaced:
+                discard_in_background(old_folder)
+        self._release()
+
+    def discard(self):
+        """
+        Drop the staged folder in the background, leaving the patch folder as it was.
+        After commit the new folder is moved back out and the replaced one put back.
+        """
+        if self._committed is not None:
+            kept, old_folder, replaced = self._committed
+            self._committed = None
+            try:
+                os.rename(self.target, self.folder)
+                if replaced:
+                    os.rename(old_folder, self.target)
+                    self._return_files(kept, self.folder, self.target)
+            except OSError as e:
+                print(f"Warning: Could not restore {self.target}: {e}")
+                log_error(f"Warning: Could not restore {self.target}: {e}")
+            with _active_stages_lock:
+                _active_stages.discard(old_folder)
+        self._release()
+        discard_in_background(self.folder)
+
+    def _release(self):
+        with _active_stages_lock:
+            _active_stages.discard(self.folder)
+
 def create_depend_txt(db_handler, patch_version_folder, patch_id):
     try:
-        patch_files = db_handler.get_patch_file_list_new(patch_id)
+        # Earlier patches holding a lower version of any file in this patch, in one query
+        patch_names = db_handler.get_patch_dependencies(patch_id)
+        module_map = db_handler.get_module_map()
         depend_content = set()  # Use a set to avoid duplicates
+
+        for patch_name in patch_names:
+            # Extract build number from patch name
+            build_number = extract_build_number(patch_name, module_map)
+            if build_number != "'ERROR',3,0,0":
+                depend_content.add(build_number)
         
-        for file_info in patch_files:
-            folder_path = ""
-
-            folder_path = file_info['PATH'].replace(file_info['NAME'], "")
-
-            file_name = file_info['NAME']
-            current_version = file_info.get('VERSION')
-            if current_version is None:
-                continue
-            # Get previous versions of this file from other patches
-            previous_versions = db_handler.get_folder_patch_list_new(folder_path)
-            # Filter for this specific file with versions < current version
-            for pv in previous_versions:
-                if (pv['NAME'] == file_name and 
-                    pv['DELETED_YN'] == 'N' and 
-                    pv.get('VERSION') is not None and 
-                    current_version is not None and
-                    float(pv['VERSION']) < float(current_version)):
-                    
-                    # Extract build number from patch name
-                    build_number = extract_build_number(pv['PATCH_NAME'])
-                    if build_number != "'ERROR',3,0,0":
-                        depend_content.add(build_number)
-        
+        depend_file = os.path.join(patch_version_folder, "depend.txt")
         if depend_content:
-            with open(os.path.join(patch_version_folder, "depend.txt"), 'w') as f:
-                f.write('\n'.join(sorted(depend_content)))
+            write_text_if_changed(depend_file, '\n'.join(sorted(depend_content)))
+        elif os.path.exists(depend_file):
+            os.remove(depend_file)
                 
     except Exception as e:
         raise Exception(f"Error creating depend.txt: {e}")
 
-def extract_build_number(patch_name):
+def extract_build_number(patch_name, module_map):
     """
     Replicates the ExtractBuildNumber function from VB6 code.
     Converts patch names like "J2.1.1234" to "'CORE',2,1,1234"
+    module_map is the PREFIX -> APPLICATION_ID dictionary from get_module_map,
+    a prefix missing from it is looked up with get_application_id, which reloads MODULE.
     """
-    db = dbClass()
     try:
         if not patch_name:
             return "'ERROR',0,0,0"
@@ -113,7 +278,10 @@ def extract_build_number(patch_name):
         
         # Determine application code
         prefix = patch_name[0].upper()
-        application_id = db.get_application_id(prefix)
+        application_id = module_map.get(prefix)
+        if application_id is None:
+            # Added since the map was loaded, raises if the prefix does not exist at all
+            application_id = get_application_id(prefix)
         version_part = patch_name[1:]
 
         # Split version components
@@ -160,48 +328,24 @@ def write_sql_commands(sql_file, file_path, schema):
 def create_patch_files(file, svn_path, patch_version_folder):
     """Create patch files in the appropriate locations."""
     try:
-        file_path_no_svn = file
-        if file_path_no_svn.startswith("webpage"):
-            dest_file = file_path_no_svn.replace("webpage", "Web")
-            dest_file = os.path.join(patch_version_folder, dest_file)
-            os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-            file_location = f"{svn_path}/{file_path_no_svn}"
-            shutil.copy2(file_location, dest_file)
-        elif file_path_no_svn.startswith("Database"):
-            sql_path = file_path_no_svn.replace("Database", "DB")
-            sql_path = sql_path.replace("StoredProcedures", "SP")
-            dest_file = os.path.join(patch_version_folder, sql_path)
+        # file is relative to svn_path, the FOLDER layout below it applies
+        patch_file = classify_selected_file(file, get_path_mapper())
+        if patch_file.destination:
+            dest_file = os.path.join(patch_version_folder, patch_file.destination)
             os.makedirs(os.path.dirname(dest_file), exist_ok=True)
-            file_location = f"{svn_path}/{file_path_no_svn}"
+            file_location = f"{svn_path}/{file}"
             shutil.copy2(file_location, dest_file)
     except Exception as e:
         raise Exception(f"Error creating patch files for {file}: {e}")
 
-def create_readme_file(patch_version_folder, patch_name, username, creation_date, patch_description, files):
-    """Create a ReadMe.txt file with patch information."""
+def create_readme_file(patch_version_folder, patch_name, username, creation_date, patch_description, patch_files):
+    """Create a ReadMe.txt file with patch information from the PatchFile list of the patch."""
     try:
-        # Pre-process files to avoid multiple iterations
-        webpage_files = []
-        database_files = []
-        svn_path = load_config().get("svn_path", "")
-        for file in files:
-            if isinstance(file, dict):
-                # Files from database already have their versions
-                if file["FOLDER_TYPE"] == '1':
-                    webpage_files.append(f"{file["PATH"]} ({file['VERSION']})")
-                else:
-                    database_files.append(f"{file["PATH"]} ({file['VERSION']})")
-            else:
-                revision = get_file_head_revision(file)
-                filePathWithoutProjects = file
-
-                if get_relative_path(svn_path) != "" and filePathWithoutProjects.startswith(get_relative_path(svn_path)):
-                    filePathWithoutProjects = filePathWithoutProjects.replace(get_relative_path(svn_path), "")[1:]
-
-                if filePathWithoutProjects.startswith("webpage"):
-                    webpage_files.append(f"{file} ({revision})")
-                else:
-                    database_files.append(f"{file} ({revision})")
+        webpage_files = [f"{patch_file.source} ({patch_file.revision})" for patch_file in patch_files if patch_file.category == WEB]
+        dll_files = [f"{patch_file.source} ({patch_file.revision})" for patch_file in patch_files if patch_file.category == DLL]
+        cgi_files = [f"{patch_file.source} ({patch_file.revision})" for patch_file in patch_files if patch_file.category == CGI]
+        database_files = [f"{patch_file.source} ({patch_file.revision})" for patch_file in patch_files
+                          if patch_file.category not in (WEB, DLL, CGI)]
 
         # Write everything in one go
         content = [
@@ -216,48 +360,28 @@ def create_readme_file(patch_version_folder, patch_name, username, creation_date
             "\nDatabase Files:",
             *database_files
         ]
+        # Only patches shipping DLL or CGI files get those sections
+        if dll_files:
+            content += ["\nDLL Files:", *dll_files]
+        if cgi_files:
+            content += ["\nCGI Files:", *cgi_files]
         
-        with open(os.path.join(patch_version_folder, "ReadMe.txt"), "w") as readme:
-            readme.write("\n".join(content))
+        write_text_if_changed(os.path.join(patch_version_folder, "ReadMe.txt"), "\n".join(content))
             
     except Exception as e:
         raise Exception(f"Error creating ReadMe.txt: {e}")
 
-def create_main_sql_file(patch_version_folder, files, patch_name=None, version_info=None, application_id=None):
-    """Create MainSQL.sql file with SQL commands."""
+def create_main_sql_file(patch_version_folder, patch_files, patch_name=None, version_info=None, application_id=None):
+    """Create MainSQL.sql file with SQL commands for the database files of the PatchFile list."""
     try:
         # Start with header commands
         sql_commands = ["prompt &&HOST", "prompt &&PERSON", "set echo on\n"]
         
         # Group files by schema
         schema_files = {}
-
-        svn_path = load_config().get("svn_path", "")
-
-        # Process and organize files by schema
-        for file in files:
-            if isinstance(file, dict):
-                filePathWithoutProjects = file["PATH"]
-                filePathWithoutProjects = filePathWithoutProjects.replace(file["SVN_PATH"], "")
-            elif isinstance(file, str):
-                filePathWithoutProjects = file
-                if get_relative_path(svn_path) != "" and isinstance(filePathWithoutProjects, str) and filePathWithoutProjects.startswith(get_relative_path(svn_path)):
-                    filePathWithoutProjects = filePathWithoutProjects.replace(get_relative_path(svn_path), "")[1:]
-            
-
-            if isinstance(file, dict) and file["FOLDER_TYPE"] == '2':
-                filePathWithoutProjects = "Database" + filePathWithoutProjects
-                schema = filePathWithoutProjects.split("/")[1]
-                file_path = filePathWithoutProjects.replace("Database", "DB").replace("StoredProcedures", "SP")
-                if schema not in schema_files:
-                    schema_files[schema] = []
-                schema_files[schema].append(file_path)
-            elif isinstance(file, str) and filePathWithoutProjects.startswith("Database"):
-                file_path = filePathWithoutProjects.replace("Database", "DB").replace("StoredProcedures", "SP")
-                schema = filePathWithoutProjects.split("/")[1]
-                if schema not in schema_files:
-                    schema_files[schema] = []
-                schema_files[schema].append(file_path)
+        for patch_file in patch_files:
+            if patch_file.category == DATABASE:
+                schema_files.setdefault(patch_file.schema, []).append(patch_file.destination)
         
         # Generate SQL commands - group PKS and PKB files together per schema, but execute all PKS before PKB within each schema
         for schema, paths in schema_files.items():
@@ -333,7 +457,7 @@ def create_main_sql_file(patch_version_folder, files, patch_name=None, version_i
                 f"CALL CMATC.PKG_VERSION_CONTROL.SETCURRENTVERSION('{application_id}',{major},{minor},{revision},'&&PERSON');"
             )
         elif patch_name:
-            version = extract_build_number(patch_name)
+            version = extract_build_number(patch_name, get_module_map())
             application_id, major, minor, revision = version.split(",")
             revision = str(revision).zfill(4)
             sql_commands.append(
@@ -343,8 +467,7 @@ def create_main_sql_file(patch_version_folder, files, patch_name=None, version_i
         sql_commands.extend(["commit;", "\nexit;"])
         
         # Write commands to file
-        with open(os.path.join(patch_version_folder, "MainSQL.sql"), "w") as main_sql:
-            main_sql.write("\n".join(sql_commands))
+        write_text_if_changed(os.path.join(patch_version_folder, "MainSQL.sql"), "\n".join(sql_commands))
             
     except Exception as e:
         raise Exception(f"Error creating MainSQL.sql: {e}")
@@ -362,95 +485,134 @@ def _generate_sql_commands(file_path, schema):
         "set echo on\n"
     ]
 
-def setup_patch_folder(patch_version_folder):
-    """Set up the patch folder with required files."""
-    try:
-        copy_InstallConfig(patch_version_folder)
-        copy_RunScript(patch_version_folder)
-        copy_UnderTestInstallConfig(patch_version_folder)
-    except Exception as e:
-        raise e
+def setup_patch_folder(patch_version_folder, manifest=None):
+    """
+    Set up the patch folder with required files, exporting the tools concurrently.
+    With a manifest the tools are only exported when they are missing from the folder.
+    """
+    if manifest is not None and manifest.tools_exported and all(manifest.locate(name) for name in TOOL_FILES):
+        return
+    # Replace rather than overwrite, a copy left by an earlier build may be read-only
+    for name in TOOL_FILES:
+        unlink_if_exists(os.path.join(patch_version_folder, name))
+    copy_functions = [copy_InstallConfig, copy_RunScript, copy_UnderTestInstallConfig]
+    results = get_svn_executor().map(lambda copy_function: copy_function(patch_version_folder), copy_functions)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    if manifest is not None:
+        manifest.tools_exported = True
 
 def get_md5_checksum_batch(files):
-    """Returns MD5 checksums for multiple files in a batch."""
-    results = {}
-    for file_path in files:
+    """Returns MD5 checksums for multiple files, hashed in parallel and skipping unchanged files."""
+    return get_md5_checksums(files)
+
+def get_patch_files(files, revisions=None):
+    """
+    Classify the working copy files of a patch once, for every artifact writer.
+    revisions maps file paths to their committed revision, as returned by commit_files.
+    Paths missing from it are looked up with one batched query.
+    """
+    relative_path = get_wc_context().relative_path
+    revisions = dict(revisions or {})
+    missing = [file for file in files if file not in revisions]
+    if missing:
+        revisions.update(get_file_head_revision_batch(missing))
+    mapper = get_path_mapper()
+    return [classify_selected_file(file, mapper, relative_path, revisions.get(file, "")) for file in files]
+
+def get_patch_files_from_rows(rows):
+    """Classify the files of a stored patch, from dbClass.get_patch_file_list_new rows."""
+    mapper = get_path_mapper()
+    return [classify_patch_row(row, mapper) for row in rows]
+
+def get_patch_details(patch_files, wc_root):
+    """
+    Build the PATCH_DETAIL rows of committed files for dbClass.create_patch_details.
+    Files not hashed while copying are hashed in one batch.
+    """
+    md5_checksums = get_md5_checksum_batch([f"{wc_root}/{patch_file.source}" for patch_file in patch_files if not patch_file.md5])
+    details = []
+    for patch_file in patch_files:
+        file = patch_file.source
+        filename = os.path.basename(file)
+        parts = file.replace("\\", "/").split("/")
+        if file.startswith('Projects/'):
+            soft_path = "/".join(parts[:4])
+        else:
+            soft_path = "/".join(parts[:1])
+        details.append({
+            'folder': '$/Projects/SVN/' + file,
+            'clean_path': file.replace(filename, ""),
+            'name': filename,
+            'version': patch_file.revision,
+            'soft_path': soft_path,
+            'md5': patch_file.md5 or md5_checksums.get(f"{wc_root}/{file}")
+        })
+    return details
+
+def create_patch_files_batch(patch_files, patch_version_folder, manifest=None):
+    """
+    Create patch files in batches with proper error handling.
+    Each source is read once to both copy and hash it, the MD5 is set on its PatchFile
+    for get_patch_details.
+    With a manifest, files already in the folder at the same revision are kept as they
+    are and files no longer in the patch are deleted.
+    """
+    wc_root = get_wc_context().wc_root
+    shipped = [patch_file for patch_file in patch_files if patch_file.destination]
+
+    # Verify write permissions once for the whole patch folder
+    try:
+        os.makedirs(patch_version_folder, exist_ok=True)
+        test_file = os.path.join(patch_version_folder, ".write_test")
         try:
-            md5_hash = hashlib.md5()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    md5_hash.update(chunk)
-            results[file_path] = md5_hash.hexdigest()
+            with open(test_file, 'w') as f:
+                f.write("test")
+            os.remove(test_file)
         except Exception as e:
-            results[file_path] = None
-            print(f"Error calculating MD5 for {file_path}: {e}")
-            log_error(f"Error calculating MD5 for {file_path}: {e}")
-    return results
-
-def create_patch_files_batch(files, svn_path, patch_version_folder):
-    """Create patch files in batches with proper error handling."""
-    web_files = []
-    db_files = []
-    
-    # First, categorize files
-    for file in files:
-        file_path_no_svn = file
-        if get_relative_path(svn_path) != "" and file_path_no_svn.startswith(get_relative_path(svn_path)):
-            file_path_no_svn = file_path_no_svn.replace(get_relative_path(svn_path), "")[1:]
-        if file_path_no_svn.startswith("webpage"):
-            web_files.append((
-                file_path_no_svn,
-                file_path_no_svn.replace("webpage", "Web"),
-                f"{svn_path}/{file_path_no_svn}"
-            ))
-        elif file_path_no_svn.startswith("Database"):
-            sql_path = file_path_no_svn.replace("Database", "DB").replace("StoredProcedures", "SP")
-            db_files.append((
-                file_path_no_svn,
-                sql_path,
-                f"{svn_path}/{file_path_no_svn}"
-            ))
+            raise PermissionError(f"No write permission in directory: {patch_version_folder}")
+    except Exception as e:
+        raise Exception(f"Failed to create/verify directory {patch_version_folder}: {e}")
+
     # Create directories with error handling
     directories = set()
-    for _, dest_path, _ in web_files + db_files:
-        directories.add(os.path.dirname(os.path.join(patch_version_folder, dest_path)))
+    for patch_file in shipped:
+        directories.add(os.path.dirname(os.path.join(patch_version_folder, patch_file.destination)))
     
     for directory in directories:
         try:
-            if not os.path.exists(directory):
-                os.makedirs(directory, exist_ok=True)
-            # Verify write permissions
-            test_file = os.path.join(directory, ".write_test")
-            try:
-                with open(test_file, 'w') as f:
-                    f.write("test")
-                os.remove(test_file)
-            except Exception as e:
-                raise PermissionError(f"No write permission in directory: {directory}")
+            os.makedirs(directory, exist_ok=True)
         except Exception as e:
             raise Exception(f"Failed to create/verify directory {directory}: {e}")
 
+    copies = []
+    for patch_file in shipped:
+        if manifest is not None:
+            patch_file.md5 = manifest.current_md5(patch_file.destination, patch_file.source, patch_file.revision)
+        if not patch_file.md5:
+            copies.append(patch_file)
+
+    # Unchanged sources are already hashed, those can take the zero-copy path
+    known_checksums = get_cached_md5_checksums([f"{wc_root}/{patch_file.source}" for patch_file in copies])
+    new_checksums = {}
+
     # Copy files with retries
     max_retries = 3
     retry_delay = 0.5  # seconds
     
-    for file_info in web_files + db_files:
-        org_path, dest_path, src_location = file_info
-        dest_file = os.path.join(patch_version_folder, dest_path)
+    for patch_file in copies:
+        src_location = f"{wc_root}/{patch_file.source}"
+        dest_file = os.path.join(patch_version_folder, patch_file.destination)
         
         for attempt in range(max_retries):
             try:
-                # Ensure destination directory exists and is writable
-                dest_dir = os.path.dirname(dest_file)
-                if not os.path.exists(dest_dir):
-                    os.makedirs(dest_dir, exist_ok=True)
-                
-                # If file exists, ensure it's writable
-                if os.path.exists(dest_file):
-                    os.chmod(dest_file, 0o666)
-                
-                # Copy the file
-                shutil.copy2(src_location, dest_file)
+                # Copy the file, hashing it on the way
+                patch_file.md5 = copy_with_md5(src_location, dest_file, known_checksums.get(src_location))
+                if src_location not in known_checksums:
+                    new_checksums[src_location] = patch_file.md5
+                if manifest is not None:
+                    manifest.record(patch_file.destination, patch_file.source, patch_file.revision, patch_file.md5)
                 break
             except PermissionError as e:
                 if attempt == max_retries - 1:
@@ -458,5 +620,9 @@ def create_patch_files_batch(files, svn_path, patch_version_folder):
                 time.sleep(retry_delay)
             except Exception as e:
                 if attempt == max_retries - 1:
-                    raise Exception(f"Failed to copy {org_path} to {dest_file}: {e}")
-                time.sleep(retry_delay)
\ No newline at end of file
+                    raise Exception(f"Failed to copy {patch_file.source} to {dest_file}: {e}")
+                time.sleep(retry_delay)
+
+    remember_md5_checksums(new_checksums)
+    if manifest is not None:
+        manifest.remove_stale(patch_file.destination for patch_file in shipped)
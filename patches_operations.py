@@ -1,76 +1,240 @@
 # patches_operation.py
-from db_handler import dbClass
-from svn_operations import get_file_specific_version, get_file_info, commit_files, get_file_head_revision
+from db_handler import dbClass, PATCH_PAGE_SIZE, refresh_reference_data
+from export_pipeline import plan_exports, run_exports
+from checksum_cache import get_md5_checksums
+from svn_operations import get_file_info, commit_files, get_wc_context
 import os
 from config import load_config, verify_config, log_error, log_success
 from patch_generation import create_patch_files_batch
 import tkinter as tk
+import threading
 import time
-from patch_utils import get_md5_checksum, cleanup_files, create_depend_txt, create_readme_file, setup_patch_folder, create_main_sql_file
+from patch_utils import get_patch_files, get_patch_files_from_rows, get_patch_details, PatchFolderStage, discard_in_background, create_depend_txt, create_readme_file, setup_patch_folder, create_main_sql_file
 from tkinter import messagebox
 import datetime as date
 from dialog import display_patch_files
-import subprocess
 
 patch_info_dict = {}
 
 selected_patch = None
 
-def refresh_patches(treeview, temp, application_id, username):
+# Patches loaded for each (temp, application_id), kept between refreshes so only changes are fetched
+patch_lists = {}
+
+# Milliseconds between checks for a page fetched in the background
+PAGE_POLL_INTERVAL = 30
+
+def _patch_row_values(patch):
+    # Replace None or empty fields with ""
+    return (
+        patch.get("NAME") or "",
+        patch.get("COMMENTS") or "",
+        patch.get("PATCH_SIZE") or 0,
+        patch.get("USER_ID") or "",
+        patch.get("CREATION_DATE") or "",
+        patch.get("CHECK_LIST_COUNT") or ""
+    )
+
+def _cache_patch(patch_list, patch):
+    old_patch = patch_list["patches"].get(patch["PATCH_ID"])
+    if old_patch is not None and old_patch["NAME"] != patch["NAME"]:
+        patch_info_dict.pop(old_patch["NAME"], None)
+    patch_list["patches"][patch["PATCH_ID"]] = patch
+    patch_info_dict[patch["NAME"]] = patch
+
+def _uncache_patch(patch_list, patch_id):
+    patch = patch_list["patches"].pop(patch_id, None)
+    if patch is not None:
+        patch_info_dict.pop(patch["NAME"], None)
+
+def _restore_sort_order(treeview):
+    """Put rows back in the order the user chose with a column heading, if any."""
+    resort = getattr(treeview, "resort", None)
+    if resort is not None:
+        resort()
+
+def _fetch_patch_list_changes(patch_list):
     """
-    Refresh the patches displayed in the Treeview.
+    Apply the headers created, modified or deleted since the last refresh to a patch list.
+    Returns the changed patches and the removed PATCH_IDs.
     """
-    db = dbClass()
+    loaded_ids = patch_list["patches"]
+    lowest_patch_id, highest_patch_id = (min(loaded_ids), max(loaded_ids)) if loaded_ids else (0, 0)
+    with dbClass() as db:
+        changes, patch_list["changed_scn"] = db.get_patch_list_changes(
+            patch_list["temp"], patch_list["application_id"], patch_list["changed_scn"],
+            lowest_patch_id, highest_patch_id)
 
-    # Clear existing items
-    for item in treeview.get_children():
-        treeview.delete(item)
-    patch_info_dict.clear()
-
-    # Fetch patches from the database
-    patches = db.get_patch_list(temp, application_id)
-    # Insert patches into the Treeview
-    for patch in patches:
-        # Replace None or empty fields with ""
-        name = patch.get("NAME") or ""
-        comments = patch.get("COMMENTS") or ""
-        patch_size = patch.get("PATCH_SIZE") or 0
-        user_id = patch.get("USER_ID") or ""
-        creation_date = patch.get("CREATION_DATE") or ""
-        checklist_count = patch.get("CHECK_LIST_COUNT") or ""
-
-        patch_info_dict[name] = patch
-
-        treeview.insert("", "end", values=(
-            name,
-            comments,
-            patch_size,
-            user_id,
-            creation_date,
-            checklist_count
-        ))
-
-def refresh_patches_dict(temp, application_id):
+    changed = []
+    removed = set()
+    for patch in changes:
+        if patch.get("DELETED_YN") == "Y":
+            removed.add(patch["PATCH_ID"])
+        elif patch_list["complete"] or patch_list["last_patch_id"] is None or patch["PATCH_ID"] >= patch_list["last_patch_id"]:
+            changed.append(patch)
+        # Patches below the loaded pages come with their page
+    for patch_id in removed:
+        _uncache_patch(patch_list, patch_id)
+    for patch in changed:
+        _cache_patch(patch_list, patch)
+    return changed, removed
+
+def refresh_patches(treeview, temp, application_id, username, on_loaded=None):
     """
     Refresh the patches displayed in the Treeview.
+    The first refresh of a prefix loads its first page, load_more_patches adds the next ones
+    as the user scrolls. Later refreshes only fetch the headers that changed and update
+    the existing rows.
+    on_loaded is called once the rows are in the Treeview, which for a first page
+    happens after this function returns.
     """
-    
-    db = dbClass()
+    # Prefixes, folders and checklist items edited elsewhere are picked up with the list
+    refresh_reference_data()
+    key = (temp, application_id)
+    patch_list = patch_lists.get(key)
+    # A list whose first page never arrived has nothing to compare against, start over
+    if patch_list is None or (patch_list["changed_scn"] is None and not patch_list["loading"]):
+        patch_list = patch_lists[key] = {
+            "temp": temp,
+            "application_id": application_id,
+            "patches": {},
+            "last_patch_id": None,
+            "complete": False,
+            "loading": False,
+            # SCN read before the first page, changes are fetched from there on
+            "changed_scn": None
+        }
+        # Clear existing items
+        treeview.delete(*treeview.get_children())
+        treeview.patch_list_key = key
+        load_more_patches(treeview, on_loaded)
+        return
 
-    patch_info_dict.clear()
-    
-    # Fetch patches from the database
-    patches = db.get_patch_list(temp, application_id)
-    # Insert patches into the Treeview
-    for patch in patches:
+    changed, removed = _fetch_patch_list_changes(patch_list) if patch_list["changed_scn"] is not None else ([], set())
+
+    if getattr(treeview, "patch_list_key", None) != key:
+        # Another prefix or a new Treeview, show the patches already loaded for this one
+        treeview.delete(*treeview.get_children())
+        treeview.patch_list_key = key
+        for patch_id in sorted(patch_list["patches"], reverse=True):
+            treeview.insert("", "end", iid=str(patch_id), values=_patch_row_values(patch_list["patches"][patch_id]))
+        _restore_sort_order(treeview)
+        if on_loaded is not None:
+            on_loaded()
+        return
+
+    for patch_id in removed:
+        if treeview.exists(str(patch_id)):
+            treeview.delete(str(patch_id))
+    shown_ids = None
+    for patch in sorted(changed, key=lambda patch: patch["PATCH_ID"]):
+        iid = str(patch["PATCH_ID"])
+        if treeview.exists(iid):
+            treeview.item(iid, values=_patch_row_values(patch))
+            continue
+        # Rows are ordered by PATCH_ID descending
+        if shown_ids is None:
+            shown_ids = [int(item) for item in treeview.get_children()]
+        index = sum(1 for shown_id in shown_ids if shown_id > patch["PATCH_ID"])
+        treeview.insert("", index, iid=iid, values=_patch_row_values(patch))
+        shown_ids.insert(index, patch["PATCH_ID"])
+    if changed:
+        _restore_sort_order(treeview)
+    if on_loaded is not None:
+        on_loaded()
+
+def refresh_patch_row(treeview, patch_name):
+    """Reload one patch by name and update its row, after an edit made by this application."""
+    with dbClass() as db:
+        patch = db.get_patch_by_name(patch_name)
+    if patch is None:
+        return
+    patch_list = patch_lists.get(getattr(treeview, "patch_list_key", None))
+    if patch_list is not None:
+        _cache_patch(patch_list, patch)
+    else:
         patch_info_dict[patch["NAME"]] = patch
+    if treeview.exists(str(patch["PATCH_ID"])):
+        treeview.item(str(patch["PATCH_ID"]), values=_patch_row_values(patch))
+
+def load_more_patches(treeview, on_loaded=None):
+    """
+    Append the next page of patches to the Treeview.
+    The page is fetched on a background thread and added from the Tk event loop,
+    so scrolling never waits on the database. on_loaded is called after the rows are added.
+    Does nothing once every patch is loaded or while a page is being loaded.
+    """
+    key = getattr(treeview, "patch_list_key", None)
+    patch_list = patch_lists.get(key)
+    if patch_list is None or patch_list["complete"] or patch_list["loading"]:
+        return
+
+    patch_list["loading"] = True
+    # The session is borrowed here, connection errors are reported on the UI thread
+    db = dbClass()
+    after_id = patch_list["last_patch_id"]
+    result = {}
+
+    def fetch():
+        try:
+            if patch_list["changed_scn"] is None:
+                result["scn"] = db.get_current_scn()
+            result["patches"] = db.get_patch_list_page(patch_list["temp"], patch_list["application_id"], after_id)
+        except Exception as e:
+            result["error"] = e
+        finally:
+            db.close()
 
+    worker = threading.Thread(target=fetch, name="patch-page", daemon=True)
+    worker.start()
+    # Polled from the toplevel, which outlives the Treeview when the menu is switched
+    root = treeview.winfo_toplevel()
+
+    def apply_page():
+        if worker.is_alive():
+            root.after(PAGE_POLL_INTERVAL, apply_page)
+            return
+        patch_list["loading"] = False
+        if "error" in result:
+            print(f"Failed to load patches: {result['error']}")
+            log_error(f"Failed to load patches: {result['error']}")
+            return
+        patches = result["patches"]
+        if "scn" in result:
+            patch_list["changed_scn"] = result["scn"]
+
+        if len(patches) < PATCH_PAGE_SIZE:
+            patch_list["complete"] = True
+        if patches:
+            patch_list["last_patch_id"] = patches[-1]["PATCH_ID"]
+        for patch in patches:
+            _cache_patch(patch_list, patch)
+
+        # Rows are only added while the Treeview still shows this patch list
+        if not treeview.winfo_exists() or getattr(treeview, "patch_list_key", None) != key:
+            return
+        for patch in patches:
+            if not treeview.exists(str(patch["PATCH_ID"])):
+                treeview.insert("", "end", iid=str(patch["PATCH_ID"]), values=_patch_row_values(patch))
+        if patches:
+            _restore_sort_order(treeview)
+        if on_loaded is not None:
+            on_loaded()
+
+    root.after(PAGE_POLL_INTERVAL, apply_page)
 
 def get_full_patch_info(patch_name):
     """
     Retrieve the full patch information from the dictionary.
+    Patches on pages not loaded yet are looked up by name.
     """
-    return patch_info_dict.get(patch_name, None)
+    patch = patch_info_dict.get(patch_name, None)
+    if patch is None and patch_name:
+        with dbClass() as db:
+            patch = db.get_patch_by_name(patch_name)
+        if patch is not None:
+            patch_info_dict[patch_name] = patch
+    return patch
 
 
 def set_selected_patch(patch):
@@ -84,59 +248,69 @@ def build_patch(patch_info):
     config = load_config()
     
     patch_version_folder = os.path.join(config.get("current_patches", "D:/cyframe/jtdev/Patches/Current"), patch_info["NAME"])
-    os.makedirs(patch_version_folder, exist_ok=True)
+    db = dbClass()
+    stage = None
     try:
-        db = dbClass()
         verify_config()
         svn_path = config.get("svn_path")
+        # Patch output is staged next to the patch folder and moved into place on success
+        stage = PatchFolderStage(patch_version_folder)
+        manifest = stage.open_manifest()
         
         patch_id = patch_info["PATCH_ID"]
         files = db.get_patch_file_list_new(patch_id)
 
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
-        for file in files:
-            if file["FOLDER_TYPE"] == '1':
-                file_path = file["PATH"].replace(file["SVN_PATH"], "Web")
-                file_path = file_path.replace("webpage", "Web")
-                file_location = f"{wc_root}/{file['PATH']}"
-            else:
-                file_path = file["PATH"].replace(file["SVN_PATH"], "DB")
-                file_path = file_path.replace("StoredProcedures", "SP")
-                file_path = file_path.replace("Database", "DB")
-                file_location = f"{wc_root}/{file['PATH']}"
-            get_file_specific_version(
-                file_location,
-                file_path,
-                file["NAME"],
-                file["VERSION"],  # Use the version stored in the database
-                patch_version_folder
-            )
+        wc_context = get_wc_context()
+        wc_root = wc_context.wc_root
+        # Every file classified once, with the version stored in the database
+        patch_files = get_patch_files_from_rows(files)
+        # Files outside every FOLDER have no destination and are not shipped
+        shipped = [patch_file for patch_file in patch_files if patch_file.destination]
+        exports = []
+        exported = []
+        for patch_file in shipped:
+            # Files already in the folder at the version stored in the database are kept
+            if manifest.current_md5(patch_file.destination, patch_file.source, patch_file.revision) is None:
+                exported.append(patch_file)
+                exports.append((f"{wc_root}/{patch_file.source}", patch_file.revision, os.path.join(stage.folder, patch_file.destination)))
+
+        # Deduplicated exports run concurrently, every failure is reported together
+        export_report = run_exports(plan_exports(exports, wc_context.repos_url_of), cwd=svn_path)
+        log_success("Patch Build Export", f"Patch: {patch_info['NAME']}\n"
+                    f"Unchanged: {len(shipped) - len(exports)}\n{export_report.summary()}")
+        if export_report.failures:
+            raise Exception(f"{len(export_report.failures)} file(s) could not be exported from SVN\n"
+                            f"Error might be caused by missing SVN command line tool\n\n{export_report.failure_message()}")
+
+        checksums = get_md5_checksums([os.path.join(stage.folder, patch_file.destination) for patch_file in exported])
+        for patch_file in exported:
+            patch_file.md5 = checksums.get(os.path.join(stage.folder, patch_file.destination))
+            manifest.record(patch_file.destination, patch_file.source, patch_file.revision, patch_file.md5)
+        manifest.remove_stale(patch_file.destination for patch_file in shipped)
         
         # Create supporting files with the correct file versions
         create_readme_file(
-            patch_version_folder,
+            stage.folder,
             patch_info["NAME"],
             patch_info["USER_ID"],
             str(patch_info["CREATION_DATE"]),
             patch_info["COMMENTS"],
-            files  # Pass the files with their versions from the database
+            patch_files
         )
         
-        create_main_sql_file(patch_version_folder, files, patch_name=patch_info["NAME"])
+        create_main_sql_file(stage.folder, patch_files, patch_name=patch_info["NAME"])
         
-        setup_patch_folder(patch_version_folder)
-        create_depend_txt(db, patch_version_folder, patch_id)
+        setup_patch_folder(stage.folder, manifest)
+        create_depend_txt(db, stage.folder, patch_id)
+        manifest.save()
+        stage.commit()
+        stage.finish()
         
         tk.messagebox.showinfo("Info", "Patch built successfully!")
     except Exception as e:
         db.conn.rollback()
-        cleanup_files(patch_version_folder)
+        if stage is not None:
+            stage.discard()
         tk.messagebox.showerror("Error", f"Failed to build patch: {e}")
         print(f"Failed to build patch: {str(e)}")
         print(f"Date:" + date.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
@@ -144,19 +318,20 @@ def build_patch(patch_info):
         log_error(f"Failed to build patch: {str(e)}")
         log_error(f"Date:" + date.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
         log_error(f"------------------------------")
+    finally:
+        db.close()
 
 def refresh_patch_files(treeview, patch_info):
     """
     Refresh the files in the patch.
     """
-    db = dbClass()
-    
     # Clear existing items
     for item in treeview.get_children():
         treeview.delete(item)
 
     patch_id = patch_info["PATCH_ID"]
-    files = db.get_patch_file_list_new(patch_id)
+    with dbClass() as db:
+        files = db.get_patch_file_list_new(patch_id)
     for file in files:
         if file["FOLDER_TYPE"] == '1':
             file_path = file["PATH"]
@@ -178,21 +353,19 @@ def update_patch(selected_files, patch_id, patch_version_prefixe, patch_version_
     verify_config()
     db = dbClass()
     config = load_config()
-    svn_path = config.get("svn_path")
     username = config.get("username")
 
     patch_version_entry = patch_version_entry.upper()
     patch_name = patch_version_prefixe + patch_version_entry
     
-    # Add old patch folder path to handle cleanup
+    patch_version_folder = os.path.join(config.get("current_patches"), patch_name)
+    stage = None
+
+    # Add old patch folder path to handle cleanup, the target folder is updated in place
     old_patch_name = patch_info_dict.get(patch_name, {}).get("NAME")
-    if old_patch_name:
+    if old_patch_name and old_patch_name != patch_name:
         old_patch_folder = os.path.join(config.get("current_patches"), old_patch_name)
-        cleanup_files(old_patch_folder)  # Clean up old patch folder
-        
-    patch_version_folder = os.path.join(config.get("current_patches"), patch_name)
-    # Clean up target folder as well
-    cleanup_files(patch_version_folder)
+        discard_in_background(old_patch_folder)  # Clean up old patch folder
     
     try:
         if not patch_version_entry:
@@ -209,52 +382,40 @@ def update_patch(selected_files, patch_id, patch_version_prefixe, patch_version_
                 return
         
         os.makedirs(config.get("current_patches", "D:/cyframe/jtdev/Patches/Current"), exist_ok=True)
-        commit_files(selected_files,unlock_files)
+        revisions = commit_files(selected_files, unlock_files, patch_name)
 
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
+        wc_root = get_wc_context().wc_root
 
-        db.conn.begin()
-        db.update_patch_header(patch_id, patch_version_prefixe, patch_version_entry, patch_description)
-        db.delete_patch_detail(patch_id)
-        
-        os.makedirs(patch_version_folder, exist_ok=True)
+        # Patch output is staged next to the patch folder and moved into place on success
+        stage = PatchFolderStage(patch_version_folder)
+        manifest = stage.open_manifest()
         
-        for file in selected_files:
-            fake_path = '$/Projects/SVN/' + file
-            filename = os.path.basename(file)
-            clean_path = file.replace(filename, "")
-
-            parts = file.replace("\\", "/").split("/")
-            if file.startswith('Projects/'):
-                soft_path = "/".join(parts[:4])
-            else:
-                soft_path = "/".join(parts[:1])
-            folder_id = db.get_folder_id(soft_path)
-            file_id = db.create_patch_detail(patch_id, fake_path, clean_path, filename, get_file_head_revision(file), folder_id)
-            md5checksum = get_md5_checksum(f"{wc_root}/{file}")
-            db.set_md5(patch_id, file_id, md5checksum)
-            
-        create_patch_files_batch(selected_files, svn_path, patch_version_folder)
-        
-        create_readme_file(patch_version_folder, patch_name, username, 
-                         time.strftime("%Y-%m-%d %H:%M:%S"), patch_description, selected_files)
+        patch_files = get_patch_files(selected_files, revisions)
+        create_patch_files_batch(patch_files, stage.folder, manifest)
+
+        create_readme_file(stage.folder, patch_name, username, 
+                         time.strftime("%Y-%m-%d %H:%M:%S"), patch_description, patch_files)
         
-        create_main_sql_file(patch_version_folder, selected_files,
+        create_main_sql_file(stage.folder, patch_files,
                            patch_name=patch_name)
         
-        setup_patch_folder(patch_version_folder)
-        create_depend_txt(db, patch_version_folder, patch_id)
-        
+        setup_patch_folder(stage.folder, manifest)
+
+        # Rows are written last, so locks taken for new FILES keys are held only until the commit below
+        db.conn.begin()
+        db.update_patch_header(patch_id, patch_version_prefixe, patch_version_entry, patch_description)
+        db.delete_patch_detail(patch_id)
+        db.create_patch_details(patch_id, get_patch_details(patch_files, wc_root))
+
+        create_depend_txt(db, stage.folder, patch_id)
+        manifest.save()
+        # The replaced folder is kept until the database commit, the except path puts it back
+        stage.commit()
         db.conn.commit()
+        stage.finish()
         
-        # Refresh patches dictionary and update global state
-        refresh_patches_dict(False, patch_version_prefixe)
+        # Reload the patch by name and update global state
+        patch_info_dict.pop(patch_name, None)
         full_patch_info = get_full_patch_info(patch_name)
         
         # Update the selected patch state
@@ -279,19 +440,21 @@ def update_patch(selected_files, patch_id, patch_version_prefixe, patch_version_
         
     except Exception as e:
         db.conn.rollback()
-        # Clean up any partially created files on error
-        cleanup_files(patch_version_folder)
+        # Drop the partially created files on error, the patch folder is untouched
+        if stage is not None:
+            stage.discard()
         error_msg = f"Failed to update patch: {str(e)}"
         print(error_msg)
         log_error(error_msg, include_stack=True)
         tk.messagebox.showerror("Error", error_msg)
+    finally:
+        db.close()
 
 def view_files_from_patch(patch_info):
     ## Show files from the patch in a dialog
-    db = dbClass()
-    
     patch_id = patch_info["PATCH_ID"]
-    files = db.get_patch_file_list_new(patch_id)
+    with dbClass() as db:
+        files = db.get_patch_file_list_new(patch_id)
     file_list = []
 
     for file in files:
@@ -317,8 +480,8 @@ def remove_patch(patch_info):
     Args:
         patch_info: Dictionary containing patch details
     """
+    db = dbClass()
     try:
-        db = dbClass()
         verify_config()
         
         patch_id = patch_info["PATCH_ID"]
@@ -348,4 +511,6 @@ def remove_patch(patch_info):
         log_error(error_msg, include_stack=True)
         messagebox.showerror("Error", error_msg)
         return False
+    finally:
+        db.close()
 
@@ -0,0 +1,98 @@
+# path_mapping.py
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Layout of each FOLDER_TYPE: (folder name in the working copy, folder name in the patch, description prefix)
+# ProfileDialog.create_folder registers one FOLDER of each type per patch prefix
+FOLDER_LAYOUT = {
+    '1': ("webpage", "Web", "Web for "),
+    '2': ("Database", "DB", "Database for "),
+    '3': ("DLL", "DLL", "DLL for "),
+    '4': ("CGI", "CGI", "CGI for "),
+}
+
+# Sub folder names renamed below the root of a FOLDER_TYPE, whole path segments only
+SEGMENT_RULES = {
+    '2': {"StoredProcedures": "SP"},
+}
+
+# Working copy folder name -> FOLDER_TYPE, for folders not registered in FOLDER
+_DEFAULT_TYPES = {wc_name: folder_type for folder_type, (wc_name, _, _) in FOLDER_LAYOUT.items()}
+
+class PathMapping(NamedTuple):
+    folder_type: str
+    # Path inside the patch folder
+    destination: str
+    # First folder below the FOLDER root, the schema of database files
+    subfolder: str
+
+def _segments(path: str) -> List[str]:
+    return [segment for segment in path.replace("\\", "/").split("/") if segment]
+
+class PathMapper:
+    """
+    FOLDER rows compiled into a prefix trie over path segments, keyed by SOFT_PATH and SVN_PATH.
+    map() walks a working copy path once, takes the deepest FOLDER containing it and
+    rewrites it to its destination in the patch folder, in time linear in the path length.
+    """
+
+    def __init__(self, folders: Iterable[Dict]):
+        # Nested dicts keyed by path segment, the None key holds the FOLDER_TYPE of a folder root
+        self._root: Dict = {}
+        for folder in folders:
+            folder_type = str(folder.get("FOLDER_TYPE", "")).strip()
+            if folder_type not in FOLDER_LAYOUT:
+                continue
+            for folder_path in {folder.get("SOFT_PATH"), folder.get("SVN_PATH")}:
+                if folder_path:
+                    self._add(folder_path, folder_type)
+
+    def _add(self, folder_path: str, folder_type: str) -> None:
+        node = self._root
+        for segment in _segments(folder_path):
+            node = node.setdefault(segment, {})
+        node.setdefault(None, folder_type)
+
+    @staticmethod
+    def _rewrite(folder_type: str, rest: List[str]) -> PathMapping:
+        """Destination of a file given the segments of its path below its FOLDER root."""
+        renames = SEGMENT_RULES.get(folder_type, {})
+        folders = [renames.get(segment, segment) for segment in rest[:-1]]
+        destination = "/".join([FOLDER_LAYOUT[folder_type][1], *folders, rest[-1]])
+        return PathMapping(folder_type, destination, rest[0] if len(rest) > 1 else "")
+
+    def map(self, path: str, base: str = "") -> Optional[PathMapping]:
+        """
+        Map a path relative to the working copy root, None if no FOLDER contains it.
+        Folders of the default layout directly below base, the profile's svn_path relative
+        to the working copy root, are mapped even before they are registered in FOLDER.
+        """
+        segments = _segments(path)
+        node = self._root
+        folder_type, depth = None, 0
+        # The last segment is the file name, only folders can match
+        for i, segment in enumerate(segments[:-1]):
+            node = node.get(segment)
+            if node is None:
+                break
+            if None in node:
+                folder_type, depth = node[None], i + 1
+
+        if folder_type is None:
+            base_segments = _segments(base)
+            depth = len(base_segments) + 1
+            if len(segments) <= depth or segments[:depth - 1] != base_segments:
+                return None
+            folder_type = _DEFAULT_TYPES.get(segments[depth - 1])
+            if folder_type is None:
+                return None
+        return self._rewrite(folder_type, segments[depth:])
+
+    def map_in_folder(self, folder_type, folder_path: str, path: str) -> Optional[PathMapping]:
+        """Map a path already known to be in the FOLDER at folder_path, e.g. from a PATCH_DETAIL row."""
+        folder_type = str(folder_type).strip()
+        folder_segments = _segments(folder_path or "")
+        segments = _segments(path)
+        if (folder_type not in FOLDER_LAYOUT or not folder_segments or len(segments) <= len(folder_segments)
+                or segments[:len(folder_segments)] != folder_segments):
+            return self.map(path)
+        return self._rewrite(folder_type, segments[len(folder_segments):])
@@ -2,7 +2,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
 from typing import List, Optional, Callable
 from profiles import Profile, create_profile, update_profile, delete_profile, get_profile, list_profiles
-from db_handler import dbClass
+from db_handler import dbClass, refresh_reference_data
+from sql_catalog import STATEMENTS
+from path_mapping import FOLDER_LAYOUT
 from svn_operations import is_svn_repo_root, get_relative_path
 import profiles
 class ProfileDialog:
@@ -39,12 +41,12 @@ class ProfileDialog:
     def get_existing_patch_prefixes(self):
         """Get existing patch prefixes from the database"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT PREFIX, APPLICATION_ID FROM MODULE WHERE APPLICATION_ID != 'CORE' AND PREFIX != 'J' ORDER BY PREFIX")
-            rows = cursor.fetchall()
-            result = [f"{row[0]} - {row[1]}" for row in rows]
-            cursor.close()
-            return result
+            modules = self.db.get_reference_data().modules
+            return [
+                f"{row['PREFIX']} - {row['APPLICATION_ID']}"
+                for row in modules
+                if str(row['APPLICATION_ID']).strip() != 'CORE' and str(row['PREFIX']).strip() != 'J'
+            ]
         except Exception as e:
             messagebox.showerror("Database Error", f"Failed to get patch prefixes: {str(e)}")
             return []
@@ -186,7 +188,7 @@ class ProfileDialog:
                 # Validate APPLICATION_ID is unique
                 try:
                     cursor = self.db.conn.cursor()
-                    cursor.execute("SELECT COUNT(*) FROM MODULE WHERE APPLICATION_ID = :1", (application_id,))
+                    cursor.execute(STATEMENTS["module_application_id_count"], (application_id,))
                     count = cursor.fetchone()[0]
                     if count > 0:
                         messagebox.showerror("Error", f"Application ID '{application_id}' already exists. Please choose a different one.")
@@ -194,7 +196,7 @@ class ProfileDialog:
                         continue
                     
                     # Insert new prefix with APPLICATION_ID
-                    cursor.execute("INSERT INTO MODULE (PREFIX, APPLICATION_ID, REPO) VALUES (:1, :2, :3)", 
+                    cursor.execute(STATEMENTS["add_module"],
                                 (prefix, application_id, "SVN"))
                     
                     # Update the existing prefixes list and combobox
@@ -233,14 +235,6 @@ class ProfileDialog:
         try:
             cursor = self.db.conn.cursor()
 
-            # Build path mappings (folder_type: (path_suffix, description_prefix))
-            folder_map = {
-                1: ("webpage", "Web for "),
-                2: ("Database", "Database for "),
-                4: ("CGI", "CGI for "),
-                3: ("DLL", "DLL for "),
-            }
-
             base_relative = get_relative_path(svn_path)
             if base_relative != "":
                 base_fake_path = "$/Projects/SVN/" + base_relative + "/"
@@ -248,37 +242,37 @@ class ProfileDialog:
             else:
                 base_fake_path = "$/Projects/SVN/"
 
-            # Get current max FOLDER_ID once
-            cursor.execute("SELECT NVL(MAX(FOLDER_ID), 0) FROM FOLDER")
-            next_folder_id = cursor.fetchone()[0] + 1
-
-            for folder_type, (suffix, desc_prefix) in folder_map.items():
+            missing_folders = []
+            # One folder per FOLDER_TYPE of the patch folder layout
+            for folder_type, (suffix, _, desc_prefix) in FOLDER_LAYOUT.items():
                 fake_path = f"{base_fake_path}{suffix}"
                 relative_path = f"{base_relative}{suffix}"
                 
                 # Check if path already exists
-                cursor.execute("SELECT COUNT(*) FROM FOLDER WHERE PATH = :1", (fake_path,))
+                cursor.execute(STATEMENTS["folder_exists"], (fake_path,))
                 exists = cursor.fetchone()[0]
                 
                 if not exists:
-                    cursor.execute("""
-                        INSERT INTO FOLDER 
-                        (PATH, DESCRIPTION, FOLDER_TYPE, SOFT_PATH, DEFAULT_PREFIX, REPO_TYPE, SVN_PATH, FOLDER_ID)
-                        VALUES (:1, :2, :3, :4, :5, :6, :7, :8)
-                    """, (
-                        fake_path,
-                        desc_prefix + patch_prefix,
-                        folder_type,
-                        relative_path,
-                        patch_prefix,
-                        "SVN",
-                        relative_path,
-                        next_folder_id
-                    ))
-                    next_folder_id += 1  # Increment only when inserting
+                    missing_folders.append((folder_type, fake_path, relative_path, desc_prefix))
+
+            # One block of FOLDER_IDs for all the new folders
+            folder_ids = self.db.allocate_ids("FOLDER", len(missing_folders))
+            for (folder_type, fake_path, relative_path, desc_prefix), folder_id in zip(missing_folders, folder_ids):
+                cursor.execute(STATEMENTS["create_folder"], (
+                    fake_path,
+                    desc_prefix + patch_prefix,
+                    int(folder_type),
+                    relative_path,
+                    patch_prefix,
+                    "SVN",
+                    relative_path,
+                    folder_id
+                ))
 
             self.db.conn.commit()
             cursor.close()
+            # New folders, and possibly a new prefix in MODULE
+            refresh_reference_data()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to create folder structure: {str(e)}")
             if cursor:
@@ -458,4 +452,5 @@ def show_profile_dialog(parent) -> Optional[str]:
     """Show the profile management dialog and return the selected profile name"""
     dialog = ProfileDialog(parent)
     parent.wait_window(dialog.dialog)  # Wait for dialog to close
+    dialog.db.close()  # Give the pooled session back
     return dialog.result 
\ No newline at end of file
@@ -0,0 +1,317 @@
+# sql_catalog.py
+# Every SQL statement the application runs, as constant text with bind variables.
+# Values are never formatted into the text, so each statement is parsed once by
+# Oracle and served from the client statement cache afterwards.
+from typing import Dict
+
+# Key column and sequence of every table whose keys the application allocates.
+# create_sequences.sql creates them. When a sequence is missing from the schema,
+# keys come from MAX(key) read under a table lock that is held until the
+# transaction ends, so concurrent patch creation waits instead of colliding.
+# Callers write their keyed rows just before committing to keep that lock short.
+ID_SEQUENCES = {
+    "PATCH_HEADER": ("PATCH_ID", "PATCH_HEADER_SEQ"),
+    "FILES": ("FILE_ID", "FILES_SEQ"),
+    "FOLDER": ("FOLDER_ID", "FOLDER_SEQ"),
+}
+
+# IN lists are padded with NULL to one of these sizes, so only a few statement texts exist.
+# Oracle accepts at most 1000 expressions in an IN list.
+IN_LIST_SIZES = (10, 100, 1000)
+
+STATEMENTS: Dict[str, str] = {
+    # Small tables loaded together in one round trip, each into its own ref cursor
+    "reference_data": """
+BEGIN
+    OPEN :folders FOR
+        SELECT FOLDER_ID, PATH, DESCRIPTION, FOLDER_TYPE, SOFT_PATH, DEFAULT_PREFIX, SVN_PATH
+        FROM FOLDER ORDER BY FOLDER_TYPE, PATH;
+    OPEN :modules FOR
+        SELECT PREFIX, APPLICATION_ID FROM MODULE ORDER BY PREFIX;
+    OPEN :checklist FOR
+        SELECT ITEM_ID, DISPLAY_ORDER, FILE_TYPE, ITEM_DESC, CONTENT_TYPE FROM CHECKLIST;
+END;
+""",
+    # Only the schema the statements run in, they name the sequences unqualified
+    "sequence_exists": "SELECT COUNT(*) AS COUNT FROM USER_SEQUENCES WHERE SEQUENCE_NAME = :name",
+
+    "add_folder": "INSERT INTO FOLDER (PATH, DESCRIPTION, FOLDER_TYPE) VALUES (:folder, :description, :folder_type)",
+    "rename_folder": "UPDATE FOLDER SET DESCRIPTION = :description WHERE PATH = :folder",
+    "folder_exists": "SELECT COUNT(*) FROM FOLDER WHERE PATH = :1",
+    "module_application_id_count": "SELECT COUNT(*) FROM MODULE WHERE APPLICATION_ID = :1",
+    "add_module": "INSERT INTO MODULE (PREFIX, APPLICATION_ID, REPO) VALUES (:1, :2, :3)",
+    "create_folder": """
+        INSERT INTO FOLDER
+        (PATH, DESCRIPTION, FOLDER_TYPE, SOFT_PATH, DEFAULT_PREFIX, REPO_TYPE, SVN_PATH, FOLDER_ID)
+        VALUES (:1, :2, :3, :4, :5, :6, :7, :8)
+        """,
+
+    "file_list": "SELECT FILE_ID, PATH, NAME, DELETED_YN FROM FILES WHERE PATH = :folder ORDER BY NAME",
+    "find_file": "SELECT FILE_ID FROM FILES WHERE (PATH = :folder OR CLEAN_PATH = :clean_path) AND NAME = :filename",
+    "add_files": "INSERT INTO FILES (FILE_ID, PATH, NAME, DELETED_YN, FOLDER_ID, CLEAN_PATH) VALUES (:file_id, :folder, :filename, 'N', :folder_id, :clean_path)",
+
+    "file_patch_list": """
+        SELECT F.FILE_ID, F.PATH, F.NAME, F.DELETED_YN, H.NAME AS PATCH_NAME, D.VERSION
+        FROM FILES F, PATCH_DETAIL D, PATCH_HEADER H
+        WHERE F.FILE_ID = D.FILE_ID
+        AND D.PATCH_ID = H.PATCH_ID
+        AND F.PATH = :folder
+        AND F.NAME = :name
+        AND H.TEMP_YN = 'N'
+        AND H.DELETED_YN = 'N'
+        ORDER BY D.VERSION DESC
+        """,
+    "folder_patch_list": """
+        SELECT F.FILE_ID, F.PATH, F.NAME, F.DELETED_YN, H.NAME AS PATCH_NAME, D.VERSION, D.MD5_CHECKSUM
+        FROM FILES F, PATCH_DETAIL D, PATCH_HEADER H
+        WHERE F.FILE_ID = D.FILE_ID
+        AND D.PATCH_ID = H.PATCH_ID
+        AND F.PATH = :folder
+        AND H.TEMP_YN = 'N'
+        AND H.DELETED_YN = 'N'
+        ORDER BY D.VERSION DESC
+        """,
+    "folder_patch_list_new": """
+        SELECT F.FILE_ID, F.PATH, F.NAME, F.DELETED_YN, H.NAME AS PATCH_NAME, D.VERSION, D.MD5_CHECKSUM
+        FROM FILES F, PATCH_DETAIL D, PATCH_HEADER H
+        WHERE F.FILE_ID = D.FILE_ID
+        AND D.PATCH_ID = H.PATCH_ID
+        AND F.CLEAN_PATH = :folder
+        AND H.TEMP_YN = 'N'
+        AND H.DELETED_YN = 'N'
+        ORDER BY D.VERSION DESC
+        """,
+    "patch_dependencies": """
+        SELECT DISTINCT H.NAME AS PATCH_NAME
+        FROM PATCH_DETAIL CD
+        JOIN FILES CF ON CF.FILE_ID = CD.FILE_ID
+        JOIN FILES F ON F.CLEAN_PATH = CF.CLEAN_PATH AND F.NAME = CF.NAME
+        JOIN PATCH_DETAIL D ON D.FILE_ID = F.FILE_ID
+        JOIN PATCH_HEADER H ON H.PATCH_ID = D.PATCH_ID
+        WHERE CD.PATCH_ID = :patch_id
+        AND CD.VERSION IS NOT NULL
+        AND D.VERSION < CD.VERSION
+        AND F.DELETED_YN = 'N'
+        AND H.TEMP_YN = 'N'
+        AND H.DELETED_YN = 'N'
+        """,
+
+    "update_patch_header": """
+        UPDATE PATCH_HEADER SET NAME = :patch_name, COMMENTS = :comments, CREATION_DATE = SYSDATE
+        WHERE PATCH_ID = :patch_id
+        """,
+    "delete_patch_detail": "DELETE FROM PATCH_DETAIL WHERE PATCH_ID = :patch_id",
+    "update_comment": "UPDATE PATCH_HEADER SET COMMENTS = :comments WHERE PATCH_ID = :patch_id",
+    "create_patch_detail": "INSERT INTO PATCH_DETAIL (PATCH_ID, FILE_ID, VERSION) VALUES (:patch_id, :file_id, :version)",
+    "create_patch_details": "INSERT INTO PATCH_DETAIL (PATCH_ID, FILE_ID, VERSION, MD5_CHECKSUM) VALUES (:patch_id, :file_id, :version, :checksum)",
+    "remove_patch": "UPDATE PATCH_HEADER SET DELETED_YN = 'Y' WHERE PATCH_ID = :patch_id",
+    "remove_patch_detail": "REMOVE FROM PATCH_DETAIL WHERE PATCH_ID = :patch_id",
+    "rename_patch": "UPDATE PATCH_HEADER SET NAME = :new_name WHERE PATCH_ID = :patch_id",
+    "set_md5": "UPDATE PATCH_DETAIL SET MD5_CHECKSUM = :checksum WHERE PATCH_ID = :patch_id AND FILE_ID = :file_id",
+
+    "patch_list": """
+        SELECT H.PATCH_ID, H.NAME, H.COMMENTS, DECODE(D.PATCH_ID, NULL, 0, COUNT(*)) AS PATCH_SIZE, H.USER_ID, H.CREATION_DATE,
+        CHECKLIST_COUNT(H.PATCH_ID) AS CHECK_LIST_COUNT
+        FROM PATCH_HEADER H, PATCH_DETAIL D
+        WHERE H.PATCH_ID = D.PATCH_ID (+)
+        AND DELETED_YN = 'N'
+        AND TEMP_YN = :temp_yn
+        AND APPLICATION_ID = :application_id
+        GROUP BY H.PATCH_ID, D.PATCH_ID, H.NAME, H.COMMENTS, H.USER_ID, H.CREATION_DATE
+        ORDER BY PATCH_ID DESC
+        """,
+    # One page of the patch list, newest first, continuing below :after_id (NULL for the first page).
+    # ROWNUM over the ordered inline view rather than FETCH FIRST, which needs Oracle 12c.
+    # CHECKLIST_COUNT only runs for the rows of the page.
+    "patch_list_page": """
+        SELECT P.*, CHECKLIST_COUNT(P.PATCH_ID) AS CHECK_LIST_COUNT
+        FROM (
+            SELECT H.PATCH_ID, H.NAME, H.COMMENTS, DECODE(D.PATCH_ID, NULL, 0, COUNT(*)) AS PATCH_SIZE, H.USER_ID, H.CREATION_DATE
+            FROM PATCH_HEADER H, PATCH_DETAIL D
+            WHERE H.PATCH_ID = D.PATCH_ID (+)
+            AND DELETED_YN = 'N'
+            AND TEMP_YN = :temp_yn
+            AND APPLICATION_ID = :application_id
+            AND (:after_id IS NULL OR H.PATCH_ID < :after_id)
+            GROUP BY H.PATCH_ID, D.PATCH_ID, H.NAME, H.COMMENTS, H.USER_ID, H.CREATION_DATE
+            ORDER BY H.PATCH_ID DESC
+        ) P
+        WHERE ROWNUM <= :page_size
+        ORDER BY P.PATCH_ID DESC
+        """,
+    # A watermark for ORA_ROWSCN: the SCN mapped to now is at or below the current SCN,
+    # so a row committed after this call always has a higher ORA_ROWSCN
+    "current_scn": "SELECT TIMESTAMP_TO_SCN(SYSTIMESTAMP) AS SCN FROM DUAL",
+    # Headers of the patch list changed since :since_scn, deleted ones included.
+    # A header's ORA_ROWSCN moves with every insert, edit, rename and delete of it, and with
+    # every file change, since update_patch rewrites the header with its PATCH_DETAIL rows.
+    # Checklist rows are checked within the loaded PATCH_ID range only.
+    # ORA_ROWSCN is an upper bound of the last commit SCN, rows may come back unchanged but
+    # a change committed after the previous call is never missed.
+    "patch_list_changes": """
+        SELECT P.*, CHECKLIST_COUNT(P.PATCH_ID) AS CHECK_LIST_COUNT
+        FROM (
+            SELECT H.PATCH_ID, H.NAME, H.COMMENTS, DECODE(D.PATCH_ID, NULL, 0, COUNT(*)) AS PATCH_SIZE, H.USER_ID, H.CREATION_DATE, H.DELETED_YN
+            FROM PATCH_HEADER H, PATCH_DETAIL D
+            WHERE H.PATCH_ID = D.PATCH_ID (+)
+            AND TEMP_YN = :temp_yn
+            AND APPLICATION_ID = :application_id
+            AND H.PATCH_ID IN (
+                SELECT PATCH_ID FROM PATCH_HEADER
+                WHERE TEMP_YN = :temp_yn
+                AND APPLICATION_ID = :application_id
+                AND ORA_ROWSCN > :since_scn
+                UNION
+                SELECT C.PATCH_ID FROM PATCH_CHECKLIST C
+                WHERE C.PATCH_ID BETWEEN :lowest_patch_id AND :highest_patch_id
+                AND (C.ORA_ROWSCN > :since_scn
+                     OR EXISTS (SELECT 1 FROM PATCH_CHECKLIST_DETAIL CD
+                                WHERE CD.CHECKLIST_ID = C.CHECKLIST_ID AND CD.ORA_ROWSCN > :since_scn))
+            )
+            GROUP BY H.PATCH_ID, D.PATCH_ID, H.NAME, H.COMMENTS, H.USER_ID, H.CREATION_DATE, H.DELETED_YN
+        ) P
+        ORDER BY P.PATCH_ID DESC
+        """,
+    "patch_by_name": """
+        SELECT P.*, CHECKLIST_COUNT(P.PATCH_ID) AS CHECK_LIST_COUNT
+        FROM (
+            SELECT H.PATCH_ID, H.NAME, H.COMMENTS, DECODE(D.PATCH_ID, NULL, 0, COUNT(*)) AS PATCH_SIZE, H.USER_ID, H.CREATION_DATE
+            FROM PATCH_HEADER H, PATCH_DETAIL D
+            WHERE H.PATCH_ID = D.PATCH_ID (+)
+            AND DELETED_YN = 'N'
+            AND H.NAME = :patch_name
+            GROUP BY H.PATCH_ID, D.PATCH_ID, H.NAME, H.COMMENTS, H.USER_ID, H.CREATION_DATE
+            ORDER BY H.PATCH_ID DESC
+        ) P
+        WHERE ROWNUM = 1
+        """,
+    "patch_content": """
+        SELECT DECODE(UPPER(SUBSTR(F.NAME, INSTR(F.NAME, '.', -1) + 1, 100), 'PKS', 0, 'PRC', 1, 'FNC', 2, 'PKB', 3, 4) AS FILE_ORDER,
+        D.PATCH_ID, D.FILE_ID, D.VERSION, F.PATH, F.NAME, F.DELETED_YN, H.COMMENTS, H.USER_ID, H.CREATION_DATE, D.MD5_CHECKSUM
+        FROM PATCH_DETAIL D, FILES F, PATCH_HEADER H
+        WHERE D.FILE_ID = F.FILE_ID
+        AND D.PATCH_ID = H.PATCH_ID
+        AND D.PATCH_ID = :patch_id
+        ORDER BY PATH, FILE_ORDER
+        """,
+    "all_patch_content": """
+        SELECT DECODE(UPPER(SUBSTR(F.NAME, INSTR(F.NAME, '.', -1) + 1, 100), 'PKS', 0, 'PRC', 1, 'FNC', 2, 'PKB', 3, 4) AS FILE_ORDER,
+        D.PATCH_ID, D.FILE_ID, D.VERSION, F.PATH, F.NAME, F.DELETED_YN, H.COMMENTS, H.USER_ID, H.CREATION_DATE
+        FROM PATCH_DETAIL D, FILES F, PATCH_HEADER H
+        WHERE D.FILE_ID = F.FILE_ID
+        AND D.PATCH_ID = H.PATCH_ID
+        AND MD5_CHECKSUM IS NULL
+        AND H.DELETED_YN = 'N'
+        AND H.TEMP_YN = 'N'
+        ORDER BY H.PATCH_ID DESC, PATH, FILE_ORDER
+        """,
+    # CURRENT_VERSION is read live, a release bump must be seen by the next patch
+    "max_version": """
+        SELECT NVL(MAX(H.REVISION), 0) AS REVISION, V.MAJOR, V.MINOR
+        FROM (SELECT NVL(MAX(MAJOR), 1) AS MAJOR, NVL(MAX(MINOR), 0) AS MINOR
+              FROM CURRENT_VERSION WHERE APPLICATION_ID = :application_id) V
+        LEFT JOIN PATCH_HEADER H
+        ON H.DELETED_YN = 'N' AND H.TEMP_YN = 'N'
+        AND H.MAJOR = V.MAJOR AND H.MINOR = V.MINOR
+        AND H.APPLICATION_ID = :application_id
+        GROUP BY V.MAJOR, V.MINOR
+        """,
+    "build_list": """
+        SELECT DISTINCT PATH, NAME, VERSION
+        FROM FILES F, PATCH_DETAIL PD
+        WHERE F.FILE_ID = PD.FILE_ID
+        AND PATCH_ID = (SELECT MAX(PH.PATCH_ID)
+                        FROM PATCH_DETAIL PD2, PATCH_HEADER PH
+                        WHERE PD2.FILE_ID = PD.FILE_ID
+                        AND PD2.PATCH_ID = PH.PATCH_ID
+                        AND PH.TEMP_YN = 'N'
+                        AND PH.DELETED_YN = 'N'
+                        AND PH.PATCH_ID <= :patch_id)
+        AND DELETED_YN = 'N'
+        UNION
+        SELECT PATH, NAME, TO_NUMBER(NULL) AS VERSION
+        FROM FILES F
+        WHERE NOT EXISTS (SELECT * FROM PATCH_DETAIL PD, PATCH_HEADER PH
+                          WHERE F.FILE_ID = PD.FILE_ID
+                          AND PD.PATCH_ID = PH.PATCH_ID
+                          AND PH.TEMP_YN = 'N'
+                          AND PH.DELETED_YN = 'N'
+                          AND PH.PATCH_ID <= :patch_id)
+        AND DELETED_YN = 'N'
+        """,
+    "patch_file_list": """
+        SELECT FOLDER_TYPE, SUBSTR(F.PATH, LENGTH(R.PATH) + 1) AS PATH, F.NAME, D.VERSION, D.PATCH_ID
+        FROM PATCH_DETAIL D, FILES F, FOLDER R
+        WHERE D.FILE_ID = F.FILE_ID
+        AND D.PATCH_ID = :patch_id
+        AND SUBSTR(F.PATH, 1, LENGTH(R.PATH)) = R.PATH
+        ORDER BY R.FOLDER_TYPE, F.PATH
+        """,
+    "patch_file_list_new": """
+        SELECT R.FOLDER_TYPE,
+            CONCAT(F.CLEAN_PATH, F.NAME) AS PATH,
+            R.SVN_PATH as SVN_PATH,
+            F.NAME,
+            D.VERSION,
+            D.PATCH_ID
+        FROM PATCH_DETAIL D
+        JOIN FILES F ON D.FILE_ID = F.FILE_ID
+        JOIN FOLDER R
+        ON (F.FOLDER_ID = R.FOLDER_ID
+            OR SUBSTR(F.PATH, 1, LENGTH(R.PATH)) = R.PATH)
+        WHERE D.PATCH_ID = :patch_id
+        ORDER BY R.FOLDER_TYPE, F.PATH
+        """,
+    "patch_doc_comment": """
+        SELECT TRIM(NAME) AS NAME, USER_ID, '""' || REPLACE(COMMENTS, CHR(13) || CHR(10), CHR(10)) || '""' AS COMMENTS, PATCH_ID
+        FROM PATCH_HEADER
+        WHERE PATCH_ID >= :patch_id
+        AND DELETED_YN <> 'Y'
+        AND TEMP_YN = 'N'
+        ORDER BY PATCH_ID
+        """,
+    "check_list": """
+        SELECT P.PATCH_ID, P.FILE_ID, P.VERSION, F.CHECKLIST_ID, F.CREATION_DATE, D.ITEM_VALUE, FL.NAME AS FILENAME
+        FROM PATCH_CHECKLIST F, PATCH_CHECKLIST_DETAIL D, PATCH_DETAIL P, FILES FL
+        WHERE P.PATCH_ID = :patch_id
+        AND P.PATCH_ID = F.PATCH_ID (+)
+        AND P.FILE_ID = F.FILE_ID (+)
+        AND P.VERSION = F.VERSION (+)
+        AND F.CHECKLIST_ID = D.CHECKLIST_ID (+)
+        AND P.FILE_ID = FL.FILE_ID
+        """,
+    "check_patch_exists": """
+        SELECT COUNT(*) AS COUNT
+        FROM PATCH_HEADER
+        WHERE NAME LIKE :patch_name
+        AND DELETED_YN = 'N'
+        """,
+}
+
+# Inserts whose key comes from allocate_ids; {id} is the key expression and is
+# expanded below into one statement per key source
+_KEYED_INSERTS = {
+    "add_file": ("FILES",
+        "INSERT INTO FILES (FILE_ID, PATH, NAME, DELETED_YN, FOLDER_ID, CLEAN_PATH) VALUES ({id}, :folder, :filename, 'N', :folder_id, :clean_path)"),
+    "create_patch_header": ("PATCH_HEADER", """
+        INSERT INTO PATCH_HEADER (PATCH_ID, NAME, COMMENTS, TEMP_YN, USER_ID, APPLICATION_ID, MAJOR, MINOR, REVISION)
+        VALUES ({id}, :patch_name, :comments, :temp_yn, :user_id, :application_id, :major, :minor, :revision)
+        """),
+}
+
+for _table, (_column, _sequence) in ID_SEQUENCES.items():
+    STATEMENTS[f"next_ids.{_table}"] = f"SELECT {_sequence}.NEXTVAL AS ID FROM DUAL CONNECT BY LEVEL <= :count"
+    STATEMENTS[f"lock_ids.{_table}"] = f"LOCK TABLE {_table} IN SHARE ROW EXCLUSIVE MODE"
+    STATEMENTS[f"max_id.{_table}"] = f"SELECT NVL(MAX({_column}), 0) AS MAX_ID FROM {_table}"
+
+for _name, (_table, _template) in _KEYED_INSERTS.items():
+    _column, _sequence = ID_SEQUENCES[_table]
+    STATEMENTS[f"{_name}.sequence"] = _template.format(id=f"{_sequence}.NEXTVAL") + f" RETURNING {_column} INTO :new_id"
+    STATEMENTS[f"{_name}.key"] = _template.format(id=":new_id_value") + f" RETURNING {_column} INTO :new_id"
+
+for _size in IN_LIST_SIZES:
+    _placeholders = ", ".join(f":v{n}" for n in range(_size))
+    STATEMENTS[f"files_by_name.{_size}"] = f"SELECT FILE_ID, PATH, CLEAN_PATH, NAME FROM FILES WHERE NAME IN ({_placeholders}) ORDER BY FILE_ID"
+
+# Client statement cache large enough to keep every catalog statement parsed
+STATEMENT_CACHE_SIZE = len(STATEMENTS) + 10
@@ -0,0 +1,91 @@
+# svn_executor.py
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Number of svn processes allowed to run at the same time
+DEFAULT_MAX_WORKERS = 8
+# Seconds before a single svn call is killed
+DEFAULT_TIMEOUT = 300
+
+_WORKER_PREFIX = "svn-worker"
+
+class SvnExecutor:
+    """
+    Runs independent svn calls on a bounded worker pool.
+    Results are always returned in submission order. A failed call yields its
+    exception in place of a result so the caller decides how to report it.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, timeout: Optional[float] = DEFAULT_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=_WORKER_PREFIX)
+
+    def run(self, args: List[str], cwd: Optional[str] = None, timeout: Optional[float] = None,
+            check: bool = False, encoding: Optional[str] = None, errors: Optional[str] = None,
+            env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        """Run one svn command in the calling thread with the executor timeout."""
+        return subprocess.run(
+            args,
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            encoding=encoding,
+            errors=errors,
+            shell=False,
+            check=check,
+            timeout=timeout if timeout is not None else self.timeout,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+
+    def run_all(self, commands: Iterable[List[str]], cwd: Optional[str] = None, timeout: Optional[float] = None) -> list:
+        """
+        Run svn commands concurrently.
+        Returns a CompletedProcess or the raised exception for each command, in order.
+        """
+        return self.map(lambda args: self.run(args, cwd=cwd, timeout=timeout), commands)
+
+    def map(self, func: Callable, items: Iterable) -> list:
+        """
+        Call func for every item concurrently.
+        Returns the result or the raised exception for each item, in order.
+        Calls made from a worker thread run inline so nested use cannot deadlock the pool.
+        """
+        items = list(items)
+        if len(items) <= 1 or threading.current_thread().name.startswith(_WORKER_PREFIX):
+            return [_call(func, item) for item in items]
+
+        futures = [self._pool.submit(_call, func, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+def _call(func, item):
+    try:
+        return func(item)
+    except Exception as e:
+        return e
+
+_executor: Optional[SvnExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_svn_executor() -> SvnExecutor:
+    """Get the shared svn executor, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = SvnExecutor()
+        return _executor
+
+def configure_svn_executor(max_workers: int = DEFAULT_MAX_WORKERS, timeout: Optional[float] = DEFAULT_TIMEOUT) -> SvnExecutor:
+    """Replace the shared svn executor with one using the given pool size and timeout."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = SvnExecutor(max_workers=max_workers, timeout=timeout)
+        return _executor
@@ -2,11 +2,110 @@
 import subprocess
 from tkinter import messagebox
 from config import load_config, verify_config, log_error, log_success
+from wc_db import open_wc_db
+from svn_executor import get_svn_executor
+from export_pipeline import export_file_version
 import xml.etree.ElementTree as ET
+import io
+import locale
 import os
 import re
+import tempfile
+import threading
 from datetime import datetime, timezone
 
+class WorkingCopyContext:
+    """
+    Working copy information for the active profile.
+    wc-root, the relative path of svn_path and the repository root URL are
+    resolved with a single `svn info` call and shared by every SVN helper.
+    """
+
+    def __init__(self, profile_name, svn_path):
+        self.profile_name = profile_name
+        self.svn_path = svn_path
+        self.wc_root = ""
+        self.relative_path = ""
+        self.repos_root_url = ""
+        self.wc_root_url = ""
+        self.wc_db = None
+        self._resolve()
+
+    def _resolve(self):
+        result = subprocess.run(
+            ["svn", "info", "--xml", self.svn_path],
+            capture_output=True,
+            text=True,
+            shell=False,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+        if result.returncode != 0:
+            raise Exception(f"Failed to resolve SVN working copy for '{self.svn_path}': {result.stderr}")
+
+        entry = ET.fromstring(result.stdout).find("entry")
+        if entry is None:
+            raise Exception(f"'{self.svn_path}' is not an SVN working copy")
+
+        self.wc_root = entry.findtext("wc-info/wcroot-abspath", "").replace("\\", "/").rstrip("/")
+        self.repos_root_url = entry.findtext("repository/root", "")
+
+        relative_path = self.relative_path_of(self.svn_path)
+        if relative_path is None:
+            raise ValueError(f"Path '{self.svn_path}' is not under SVN working copy root '{self.wc_root}'")
+        self.relative_path = relative_path
+
+        # URL of wc-root: drop one URL segment per segment of the relative path
+        url_parts = entry.findtext("url", "").rstrip("/").split("/")
+        if relative_path:
+            url_parts = url_parts[:-len(relative_path.split("/"))]
+        self.wc_root_url = "/".join(url_parts)
+
+        # Optional read-only wc.db backend, None means use the svn command line
+        self.wc_db = open_wc_db(self.wc_root)
+
+    def relative_path_of(self, absolute_path):
+        """Return the path relative to wc-root, or None if it is outside this working copy."""
+        abs_path_norm = absolute_path.replace("\\", "/").rstrip("/")
+        if abs_path_norm == self.wc_root:
+            return ""
+        if abs_path_norm.startswith(self.wc_root + "/"):
+            return abs_path_norm[len(self.wc_root) + 1:]
+        return None
+
+    def repos_url_of(self, absolute_path):
+        """Return the repository URL of a working copy path, or None if it is outside this working copy."""
+        relative_path = self.relative_path_of(absolute_path)
+        if relative_path is None:
+            return None
+        return f"{self.wc_root_url}/{relative_path}" if relative_path else self.wc_root_url
+
+_wc_context = None
+_wc_context_lock = threading.Lock()
+
+def get_wc_context(config=None):
+    """
+    Get the working copy context of the active profile.
+    The context is rebuilt only when the active profile or its svn_path changes.
+    """
+    global _wc_context
+    if config is None:
+        config = load_config()
+    profile_name = config.get("active_profile")
+    svn_path = (config.get("svn_path") or "").replace("\\", "/").rstrip("/")
+
+    with _wc_context_lock:
+        context = _wc_context
+        if context is None or context.profile_name != profile_name or context.svn_path != svn_path:
+            context = WorkingCopyContext(profile_name, svn_path)
+            _wc_context = context
+        return context
+
+def invalidate_wc_context():
+    """Drop the cached working copy context so the next call resolves it again."""
+    global _wc_context
+    with _wc_context_lock:
+        _wc_context = None
+
 def lock_files(selected_files, patch_listbox):
     _lock_unlock_files(selected_files, patch_listbox, lock=True)
 
@@ -33,13 +132,7 @@ def _lock_unlock_files(selected_files, patch_listbox, lock=True, batch_size=50):
 
         locked_by_others = []
         must_update_files = []
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
+        wc_root = get_wc_context().wc_root
 
         # Process files in batches
         for i in range(0, len(selected_files), batch_size):
@@ -97,217 +190,408 @@ def _lock_unlock_files(selected_files, patch_listbox, lock=True, batch_size=50):
 def refresh_locked_files(files_listbox):
     config = load_config()
     svn_path = config.get("svn_path", "").replace("\\", "/")
-    username = config.get("username")
     
     if not os.path.isdir(svn_path):
         messagebox.showwarning("Warning", "Invalid SVN path!")
         return
 
     try:
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
-
-        result = subprocess.run(
-            ["svn", "status", "--xml", "--verbose"],
-            cwd=wc_root,
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        if result.returncode != 0:
-            raise Exception(result.stderr)
-
         files_listbox.delete(*files_listbox.get_children())
-        root = ET.fromstring(result.stdout)
-
-        for entry in root.findall(".//entry"):
-            path = entry.get("path", "").replace("\\", "/")
-            wc_status = entry.find("wc-status")
-            
-            # Look for commit revision instead of wc-status revision
-            commit = wc_status.find("commit") if wc_status is not None else None
-            revision = commit.get("revision") if commit is not None else ""
-            
-            # If commit revision is not available, fall back to working copy revision
-            if not revision and wc_status is not None:
-                revision = wc_status.get("revision", "")
-
-            # Check wc-status and repos-status for lock
-            for status_tag in ["wc-status", "repos-status"]:
-                lock = entry.find(f"{status_tag}/lock")
-                relative_path = get_relative_path(svn_path).replace("\\", "/") if lock is not None else None
-                owner = lock.findtext("owner") if lock is not None else None
-                if (
-                    lock is not None
-                    and owner == username
-                    and (
-                        (relative_path and relative_path in path)
-                        or (not relative_path and not path.startswith("Projects"))
-                    )
-                ):
-                    created_utc = lock.findtext("created", "")
-                    if created_utc:
-                        dt_utc = datetime.strptime(created_utc.split(".")[0], "%Y-%m-%dT%H:%M:%S")
-                        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-                        dt_local = dt_utc.astimezone()  # Convert to local time
-                        lock_date = dt_local.strftime("%Y-%m-%d %H:%M:%S")
-                    else:
-                        lock_date = ""
-                    item = files_listbox.insert(
-                        "", "end",
-                        values=("locked", revision, path, lock_date),
-                        tags=("unchecked",)
-                    )
-                    files_listbox.selection_add(item)  # Select the item
-                    break
+        for path, revision, lock_date in iter_locked_files(config):
+            item = files_listbox.insert(
+                "", "end",
+                values=("locked", revision, path, lock_date),
+                tags=("unchecked",)
+            )
+            files_listbox.selection_add(item)  # Select the item
 
     except ET.ParseError as e:
         messagebox.showerror("Error", f"Failed to parse SVN status XML:\n{e}")
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load locked files:\n{e}")
 
-def commit_files_batch(selected_files, unlock_files, batch_size=50):
-    """Commit files in batches to avoid command line length limits."""
+def _lock_scope_filter(relative_path):
+    """
+    Build the path filter for the profile scope once per scan.
+    At the root level everything outside 'Projects' is in scope,
+    otherwise only paths under the profile's relative path are.
+    """
+    if relative_path:
+        prefix = relative_path.replace("\\", "/").rstrip("/") + "/"
+        return lambda path: path.startswith(prefix)
+    return lambda path: not path.startswith("Projects")
+
+def _format_lock_date(created_utc):
+    """Convert an SVN lock creation date (UTC) to a local time string."""
+    if not created_utc:
+        return ""
+    dt_utc = datetime.strptime(created_utc.split(".")[0], "%Y-%m-%dT%H:%M:%S")
+    dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+    dt_local = dt_utc.astimezone()  # Convert to local time
+    return dt_local.strftime("%Y-%m-%d %H:%M:%S")
+
+def _status_scan_targets(wc_context):
+    """
+    Targets of the lock scan, relative to wc-root.
+    A profile inside the working copy only scans its own subtree; the root
+    profile scans every top-level item except 'Projects'.
+    """
+    if wc_context.relative_path:
+        return [wc_context.relative_path]
+    return [
+        name for name in sorted(os.listdir(wc_context.wc_root))
+        if name != ".svn" and not name.startswith("Projects")
+    ]
+
+def iter_locked_files(config=None):
+    """
+    Stream the files locked by the current user within the profile scope.
+    `svn status` is limited to the profile subtree and its XML is consumed
+    incrementally from the pipe, so memory stays flat on large working copies.
+    Yields tuples (file_path, revision, lock_date) as they arrive.
+    """
+    if config is None:
+        config = load_config()
+    username = config.get("username")
+    wc_context = get_wc_context(config)
+    in_scope = _lock_scope_filter(wc_context.relative_path)
+
+    # Locks held by this working copy are answered from wc.db when available
+    if wc_context.wc_db is not None:
+        try:
+            locked_rows = wc_context.wc_db.locked_files(username)
+        except Exception as e:
+            print(f"wc.db lock scan failed, using svn command line: {e}")
+            log_error(f"wc.db lock scan failed, using svn command line: {e}")
+            locked_rows = None
+        if locked_rows is not None:
+            for path, revision, commit_revision, lock_created in locked_rows:
+                if in_scope(path):
+                    yield (path, commit_revision or revision, _format_lock_date(lock_created))
+            return
+
+    targets = _status_scan_targets(wc_context)
+    if not targets:
+        return
+
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(
+            ["svn", "status", "--xml", "--verbose"] + targets,
+            cwd=wc_context.wc_root,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            shell=False,
+            creationflags=subprocess.CREATE_NO_WINDOW
+        )
+
+        def read_error():
+            process.wait()
+            stderr_file.seek(0)
+            return stderr_file.read().decode("utf-8", errors="replace")
+
+        completed = False
+        try:
+            target = None
+            for event, elem in ET.iterparse(process.stdout, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == "target":
+                        target = elem
+                    continue
+                if elem.tag != "entry":
+                    continue
+
+                path = elem.get("path", "").replace("\\", "/")
+                lock = None
+                if in_scope(path):
+                    # Check wc-status and repos-status for lock
+                    for status_tag in ["wc-status", "repos-status"]:
+                        candidate = elem.find(f"{status_tag}/lock")
+                        if candidate is not None and candidate.findtext("owner") == username:
+                            lock = candidate
+                            break
+
+                if lock is not None:
+                    wc_status = elem.find("wc-status")
+
+                    # Look for commit revision instead of wc-status revision
+                    commit = wc_status.find("commit") if wc_status is not None else None
+                    revision = commit.get("revision") if commit is not None else ""
+
+                    # If commit revision is not available, fall back to working copy revision
+                    if not revision and wc_status is not None:
+                        revision = wc_status.get("revision", "")
+
+                    lock_date = _format_lock_date(lock.findtext("created", ""))
+                else:
+                    lock_date = None
+
+                # Drop processed entries so the tree never grows
+                elem.clear()
+                if target is not None:
+                    target.clear()
+
+                if lock_date is not None:
+                    yield (path, revision, lock_date)
+            completed = True
+        except ET.ParseError:
+            error = read_error()
+            if process.returncode != 0:
+                raise Exception(error)
+            raise
+        finally:
+            # Stop svn if the caller stopped iterating early or parsing failed
+            if not completed and process.poll() is None:
+                process.kill()
+            process.stdout.close()
+
+        error = read_error()
+        if process.returncode != 0:
+            raise Exception(error)
+
+def scan_locked_files(config=None):
+    """
+    Scan the working copy for files locked by the current user within the profile scope.
+    Shared by the locked files views.
+    Returns a list of tuples (file_path, revision, lock_date).
+    """
+    return list(iter_locked_files(config))
+
+def _untranslated_env():
+    """
+    The environment with svn's messages switched to untranslated English, so its plain
+    output can be parsed. Only LC_MESSAGES changes: the character set stays the native
+    one, which svn uses for paths in the output and to read --targets files.
+    """
+    env = dict(os.environ)
+    # LC_ALL would override LC_MESSAGES, keep its character set through LC_CTYPE instead
+    lc_all = env.pop("LC_ALL", None)
+    if lc_all:
+        env.setdefault("LC_CTYPE", lc_all)
+    env["LC_MESSAGES"] = "C"
+    return env
+
+# Lines svn commit prints for each path it sends to the repository, in untranslated output
+_COMMITTED_PATH_PATTERN = re.compile(r"^(?:Sending|Adding|Deleting|Replacing)\s+(?:\(bin\)\s+)?(.+?)\s*$")
+
+def _parse_committed_paths(output):
+    """Return the set of paths, with forward slashes, listed in `svn commit` output."""
+    committed = set()
+    for line in output.splitlines():
+        match = _COMMITTED_PATH_PATTERN.match(line)
+        if match:
+            committed.add(match.group(1).replace("\\", "/"))
+    return committed
+
+# Seconds allowed for a whole patch commit, which can hold hundreds of files
+COMMIT_TIMEOUT = 3600
+
+def commit_files(selected_files, unlock_files, patch_name=None):
+    """
+    Commit all files in one atomic `svn commit`, passing them through a --targets file.
+    The patch name, when given, is written in the log message.
+    Returns a dictionary mapping every selected file to its last committed revision.
+    Files sent by this commit get the new revision, only the unchanged ones are looked up.
+    """
     config = load_config()
     username = config.get("username")
-    svn_path = config.get("svn_path")
-    
+
     if not selected_files:
-        return
-        
-    base_args = [
+        return {}
+
+    message = f"Patch {patch_name} committed by {username}" if patch_name else f"Committed by {username}"
+    args = [
         "svn", "commit",
         "--username", username,
-        "--message", f"Committed by {username}",
+        "--message", message,
     ]
-    
+
     if unlock_files == False:
-        base_args.append("--no-unlock")
-    
+        args.append("--no-unlock")
+
     try:
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
+        wc_root = get_wc_context().wc_root
+        # Run untranslated, the revision and the sent paths are read from the English output
+        result = _run_svn_targets(args, selected_files, wc_root, timeout=COMMIT_TIMEOUT, env=_untranslated_env())
+        if result.returncode != 0:
+            raise Exception(result.stderr)
 
-        for i in range(0, len(selected_files), batch_size):
-            batch = selected_files[i:i + batch_size]
-            args = base_args + batch
-            result = subprocess.run(args, cwd=wc_root, capture_output=True, text=True, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
-            if result.returncode != 0:
-                raise Exception(result.stderr)
-        
-        success_details = f"Files: {len(selected_files)}\nUser: {username}\nUnlock after commit: {unlock_files}"
+        match = re.search(r"Committed revision (\d+)", result.stdout)
+        revision = match.group(1) if match else None
+
+        committed = _parse_committed_paths(result.stdout) if revision else set()
+        revisions = {file: revision for file in selected_files if file.replace("\\", "/") in committed}
+        unchanged = [file for file in selected_files if file not in revisions]
+        if unchanged:
+            revisions.update(get_file_head_revision_batch(unchanged))
+
+        success_details = f"Files: {len(selected_files)}\nUser: {username}\nUnlock after commit: {unlock_files}\nRevision: {revision}"
+        if patch_name:
+            success_details = f"Patch: {patch_name}\n" + success_details
         log_success("SVN Commit", success_details)
+        return revisions
     except Exception as e:
-        error_msg = f"Failed to commit files batch: {e}"
+        error_msg = f"Failed to commit files: {e}"
         print(error_msg)
         log_error(error_msg, include_stack=True)
         raise Exception(error_msg)
 
-def commit_files(selected_files, unlock_files):
-    """Wrapper for backward compatibility."""
-    return commit_files_batch(selected_files, unlock_files)
+# svn reads --targets files and prints its plain text output in the system locale
+# encoding (the ANSI code page on Windows), only --xml output is always UTF-8
+SVN_NATIVE_ENCODING = locale.getencoding()
 
-def get_file_info_batch(files, batch_size=50):
+def _run_svn_targets(args, targets, cwd, timeout=None, xml=False, env=None):
+    """
+    Run an svn command over many targets passed through a --targets file,
+    so the number of files is not limited by the command line length.
+    Pass xml=True for --xml commands, whose output is decoded as UTF-8.
+    Plain text output is decoded with replacement characters, so a path svn
+    printed differently can not fail a command that already succeeded.
+    env replaces the environment svn runs with, see _untranslated_env.
+    """
+    fd, targets_file = tempfile.mkstemp(prefix="svn_targets_", suffix=".txt")
+    try:
+        with os.fdopen(fd, "w", encoding=SVN_NATIVE_ENCODING) as f:
+            f.write("\n".join(targets))
+        if xml:
+            return get_svn_executor().run(args + ["--targets", targets_file], cwd=cwd, timeout=timeout,
+                                          encoding="utf-8", env=env)
+        return get_svn_executor().run(args + ["--targets", targets_file], cwd=cwd, timeout=timeout,
+                                      encoding=SVN_NATIVE_ENCODING, errors="replace", env=env)
+    finally:
+        try:
+            os.remove(targets_file)
+        except OSError:
+            pass
+
+def _svn_info_batch(files, wc_root):
+    """
+    Run a single `svn info --xml` over all files and parse every <entry> as it is read.
+    Returns a dictionary mapping file paths to dictionaries with the keys
+    revision, commit_revision, lock_owner and lock_created.
+    Entries read before a failure are kept: a non-zero exit or output that ends early
+    is reported, and so is every file svn printed no entry for. Those files are
+    missing from the result. Raises if svn failed without printing a single entry.
+    """
+    result = _run_svn_targets(["svn", "info", "--xml"], files, wc_root, xml=True)
+
+    # Entry paths come back in the local path style, map them back to the requested keys
+    requested = {file.replace("\\", "/"): file for file in files}
+    entries = {}
+    truncated = None
+    try:
+        for _, element in ET.iterparse(io.StringIO(result.stdout), events=("end",)):
+            if element.tag != "entry":
+                continue
+            file = requested.get(element.get("path", "").replace("\\", "/"))
+            if file is not None:
+                commit = element.find("commit")
+                lock = element.find("lock")
+                entries[file] = {
+                    "revision": element.get("revision", ""),
+                    "commit_revision": commit.get("revision", "") if commit is not None else "",
+                    "lock_owner": lock.findtext("owner", "") if lock is not None else "",
+                    "lock_created": lock.findtext("created", "") if lock is not None else "",
+                }
+            element.clear()
+    except ET.ParseError as e:
+        # svn stopped mid-document, only the entries closed before that point are used
+        truncated = e
+
+    if result.returncode != 0 and not entries:
+        raise Exception(f"svn info failed with exit code {result.returncode}: {result.stderr.strip()}")
+    if result.returncode != 0:
+        # svn still prints the entries it could read when some targets fail
+        print(f"Warning: svn info exited with code {result.returncode}: {result.stderr.strip()}")
+        log_error(f"Warning: svn info exited with code {result.returncode}: {result.stderr.strip()}")
+    if truncated is not None:
+        print(f"Warning: svn info output ended early after {len(entries)} entries: {truncated}")
+        log_error(f"Warning: svn info output ended early after {len(entries)} entries: {truncated}")
+
+    missing = [file for file in files if file not in entries]
+    if missing:
+        print(f"Warning: svn info returned no entry for {len(missing)} files: {', '.join(missing)}")
+        log_error(f"Warning: svn info returned no entry for {len(missing)} files: {', '.join(missing)}")
+    return entries
+
+def _info_entries(files, wc_context):
+    """
+    Get info entries for files, answered from wc.db when possible.
+    Files the wc.db backend cannot answer are queried with one `svn info` call.
+    """
+    entries = {}
+    if wc_context.wc_db is not None:
+        try:
+            entries = wc_context.wc_db.node_info(files)
+        except Exception as e:
+            print(f"wc.db lookup failed, using svn command line: {e}")
+            log_error(f"wc.db lookup failed, using svn command line: {e}")
+            entries = {}
+
+    remaining = [file for file in files if file not in entries]
+    if remaining:
+        entries.update(_svn_info_batch(remaining, wc_context.wc_root))
+    return entries
+
+def _collect_info_entries(files, wc_context, batch_size, description):
+    """Get info entries for files, running the batches concurrently on the svn executor."""
+    batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+    batch_results = get_svn_executor().map(lambda batch: _info_entries(batch, wc_context), batches)
+
+    entries = {}
+    for batch, batch_entries in zip(batches, batch_results):
+        if isinstance(batch_entries, Exception):
+            print(f"Error getting {description} for batch starting at {batch[0]}: {batch_entries}")
+            log_error(f"Error getting {description} for batch starting at {batch[0]}: {batch_entries}")
+            continue
+        entries.update(batch_entries)
+    return entries
+
+def _existing_files(files, base_path, results, missing_value):
+    """Split out files that do not exist on disk, recording missing_value for them."""
+    valid_files = []
+    for file in files:
+        if os.path.exists(os.path.join(base_path, file)):
+            valid_files.append(file)
+        else:
+            results[file] = missing_value
+            print(f"Skipping non-existent or system file: {file}")
+            log_error(f"Skipping non-existent or system file: {file}")
+    return valid_files
+
+def get_file_info_batch(files, batch_size=500):
     """
-    Get SVN info for multiple files in batches.
+    Get SVN info for multiple files in batches, one `svn info` call per batch.
+    Batches run concurrently on the shared svn executor.
     Returns a dictionary mapping file paths to (is_lock_by_user, lock_owner, revision, lock_date) tuples.
     """
     config = load_config()
     username = config.get("username")
-    svn_path = config.get("svn_path")
     results = {}
 
-    wc_root = subprocess.run(
-        ["svn", "info", "--show-item", "wc-root", svn_path],
-        capture_output=True,
-        text=True,
-        shell=False,
-        creationflags=subprocess.CREATE_NO_WINDOW
-    ).stdout.strip().replace("\\", "/")
-
-    # Process files in batches
-    for i in range(0, len(files), batch_size):
-        batch = files[i:i + batch_size]
-        valid_files = []
-        
-        # First check which files exist in SVN
-        for file in batch:
-            file_path = os.path.join(wc_root, file)
-            if os.path.exists(file_path):
-                valid_files.append(file)
-            else:
-                results[file] = (False, "", "", "")
-                print(f"Skipping non-existent or system file: {file}")
-                log_error(f"Skipping non-existent or system file: {file}")
-        
-        if not valid_files:
+    wc_context = get_wc_context(config)
+    valid_files = _existing_files(files, wc_context.wc_root, results, (False, "", "", ""))
+    entries = _collect_info_entries(valid_files, wc_context, batch_size, "info")
+
+    for file in valid_files:
+        info = entries.get(file)
+        if info is None:
+            results[file] = (False, "", "", "")
             continue
-            
-        # Process one file at a time for working copy paths
-        for file in valid_files:
+
+        # Prefer the last commit revision, fall back to the working copy revision
+        revision = info["commit_revision"] or info["revision"]
+
+        lock_owner = info["lock_owner"]
+        lock_date = ""
+        if info["lock_created"]:
             try:
-                args = ["svn", "info", "--xml", file]
-                result = subprocess.run(args, capture_output=True, text=True, cwd=wc_root, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
-                
-                if result.returncode == 0:
-                    root = ET.fromstring(result.stdout)
-                    entry = root.find(".//entry")
-                    if entry is not None:
-                        # Get the <commit> element instead of the entry revision
-                        commit = entry.find(".//commit")
-                        if commit is not None:
-                            # Get revision from the commit element
-                            revision = commit.get("revision", "")
-                        else:
-                            # Fall back to working copy revision if commit is not found
-                            revision = entry.get("revision", "")
-                        
-                        lock = entry.find(".//lock")
-                        if lock is not None:
-                            lock_owner = lock.findtext("owner", "")
-                            created_str = lock.findtext("created", "")
-                            if created_str:
-                                try:
-                                    dt = datetime.strptime(created_str.split(".")[0], "%Y-%m-%dT%H:%M:%S")
-                                    lock_date = dt.strftime("%Y-%m-%d %H:%M:%S")
-                                except:
-                                    lock_date = ""
-                            else:
-                                lock_date = ""
-                            
-                            is_lock_by_user = lock_owner == username
-                        else:
-                            lock_owner = ""
-                            lock_date = ""
-                            is_lock_by_user = False
-                        
-                        results[file] = (is_lock_by_user, lock_owner, revision, lock_date)
-                    else:
-                        results[file] = (False, "", "", "")
-                else:
-                    print(f"Warning: Could not get info for {file}: {result.stderr}")
-                    log_error(f"Warning: Could not get info for {file}: {result.stderr}")
-                    results[file] = (False, "", "", "")
-                    
-            except ET.ParseError:
-                print(f"Warning: XML parsing error for {file}")
-                log_error(f"Warning: XML parsing error for {file}")
-                results[file] = (False, "", "", "")
-            except Exception as e:
-                print(f"Error getting info for {file}: {e}")
-                log_error(f"Error getting info for {file}: {e}")
-                results[file] = (False, "", "", "")
+                dt = datetime.strptime(info["lock_created"].split(".")[0], "%Y-%m-%dT%H:%M:%S")
+                lock_date = dt.strftime("%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                lock_date = ""
+
+        is_lock_by_user = bool(lock_owner) and lock_owner == username
+        results[file] = (is_lock_by_user, lock_owner, revision, lock_date)
 
     return results
 
@@ -319,57 +603,22 @@ def get_file_info(file):
     results = get_file_info_batch([file])
     return results.get(file, (False, "", "", ""))
 
-def get_file_revision_batch(files, batch_size=50):
+def get_file_revision_batch(files, batch_size=500):
     """
-    Get SVN revision numbers for multiple files in batches.
+    Get SVN revision numbers for multiple files in batches, one `svn info` call per batch.
     Returns a dictionary mapping file paths to revision numbers.
     """
     config = load_config()
     svn_path = config.get("svn_path")
     results = {}
-    
-    for i in range(0, len(files), batch_size):
-        batch = files[i:i + batch_size]
-        valid_files = []
-        
-        # First check which files exist in SVN
-        for file in batch:
-            file_path = os.path.join(svn_path, file)
-            if os.path.exists(file_path):
-                valid_files.append(file)
-            else:
-                results[file] = ""
-                print(f"Skipping non-existent or system file: {file}")
-                log_error(f"Skipping non-existent or system file: {file}")
-        
-        if not valid_files:
-            continue
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
-        # Process one file at a time for working copy paths
-        for file in valid_files:
-            try:
-                args = ["svn", "info", "--show-item", "revision", file]
-                result = subprocess.run(args, capture_output=True, text=True, cwd=wc_root, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
-                
-                if result.returncode == 0:
-                    revision = result.stdout.strip()
-                    results[file] = revision
-                else:
-                    print(f"Warning: Could not get revision for {file}: {result.stderr}")
-                    log_error(f"Warning: Could not get revision for {file}: {result.stderr}")
-                    results[file] = ""
-                    
-            except Exception as e:
-                print(f"Error getting revision for {file}: {e}")
-                log_error(f"Error getting revision for {file}: {e}")
-                results[file] = ""
-                
+
+    wc_context = get_wc_context(config)
+    valid_files = _existing_files(files, svn_path, results, "")
+    entries = _collect_info_entries(valid_files, wc_context, batch_size, "revisions")
+
+    for file in valid_files:
+        results[file] = entries.get(file, {}).get("revision", "")
+
     return results
 
 def get_file_revision(file):
@@ -395,10 +644,10 @@ def get_file_specific_version(file_path, file_folderStruture, file_name, revisio
         os.makedirs(destination_folder, exist_ok=True)  
     try:
         # Use svn export with specific revision
-        args = ["svn", "export", "-r", str(revision), "--force", file_path, os.path.join(destination_folder, file_name)]
-        result = subprocess.run(args, capture_output=True, text=True, cwd=config.get("svn_path"), shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
-        if result.returncode != 0:
-            raise Exception(f"SVN export failed: {result.stderr}")
+        # The export cache is keyed by repository URL, files outside the working copy always go to svn
+        repos_url = get_wc_context(config).repos_url_of(file_path)
+        export_file_version(get_svn_executor(), file_path, revision, os.path.join(destination_folder, file_name),
+                            cwd=config.get("svn_path"), repos_url=repos_url)
     except Exception as e:
         raise Exception(f"Failed to export {file_path} revision {revision} from SVN\nError might be caused by missing SVN command line tool\n\n {e}")
     
@@ -406,131 +655,57 @@ def revert_files(selected_files):
     """
     Reverts the changes made to the selected files in the SVN working copy.
     """
-    config = load_config()
-    svn_path = config.get("svn_path")
+    if not selected_files:
+        return
 
     try:
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
-        for file in selected_files:
-            # Run the SVN revert command for each file
-            try:
-                args = ["svn", "revert", file]
-                subprocess.run(args, capture_output=True, text=True, cwd=wc_root, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
-            except Exception as e:
-                raise Exception("Failed to run SVN revert command", e)
+        wc_root = get_wc_context().wc_root
+        # Reverts write to the working copy database, so all files go through one svn call
+        try:
+            _run_svn_targets(["svn", "revert"], selected_files, wc_root)
+        except Exception as e:
+            raise Exception("Failed to run SVN revert command", e)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to run SVN revert file\nError might be cause by missing SVN command line tool\n\n {e}")
 
 def copy_InstallConfig(destination):
     # Copy InstallConfig.exe from the remote SVN Tools/Misc Tools/InstallConfig folder to the local destination
-    config = load_config()
-    svn_path = config.get("svn_path")
     try:
-        result = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        wc_root = result.stdout.strip().replace("\\", "/")
-        subprocess.run(["svn", "export", "--force", f"{wc_root}/Tools/Misc Tools/InstallConfig/InstallConfig.exe", destination], check=True,  stdout=subprocess.DEVNULL, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
+        wc_root = get_wc_context().wc_root
+        get_svn_executor().run(["svn", "export", "--force", f"{wc_root}/Tools/Misc Tools/InstallConfig/InstallConfig.exe", destination], check=True)
     except subprocess.CalledProcessError as e:
         raise Exception(f"Failed to copy InstallConfig.exe from SVN: {e}")
 
 def copy_RunScript(destination):
     # Copy RunScript.exe from the remote SVN Tools/Misc Tools/InstallConfig folder to the local destination
-    config = load_config()
-    svn_path = config.get("svn_path")
     try:
-        result = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        wc_root = result.stdout.strip().replace("\\", "/")
-        subprocess.run(["svn", "export", "--force", f"{wc_root}/Tools/Misc Tools/InstallConfig/RunScript.bat", destination], check=True,  stdout=subprocess.DEVNULL, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
+        wc_root = get_wc_context().wc_root
+        get_svn_executor().run(["svn", "export", "--force", f"{wc_root}/Tools/Misc Tools/InstallConfig/RunScript.bat", destination], check=True)
     except Exception as e:
         raise Exception(f"Failed to copy RunScript.exe from SVN: {e}")
 
 def copy_UnderTestInstallConfig(destination):
     # Copy InstallConfig.exe from the remote SVN Tools/Misc Tools/InstallConfig folder to the local destination
-    config = load_config()
-    svn_path = config.get("svn_path")
     try:  
-        result = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        wc_root = result.stdout.strip().replace("\\", "/")
-        subprocess.run(["svn", "export", "--force", f"{wc_root}/Tools/Test/UNDERTEST_InstallConfig.exe", destination], check=True,  stdout=subprocess.DEVNULL, creationflags=subprocess.CREATE_NO_WINDOW)
+        wc_root = get_wc_context().wc_root
+        get_svn_executor().run(["svn", "export", "--force", f"{wc_root}/Tools/Test/UNDERTEST_InstallConfig.exe", destination], check=True)
     except Exception as e:
         raise Exception(f"Failed to copy UNDERTEST_InstallConfig.exe: {e}")
 
-def get_file_head_revision_batch(files, batch_size=50):
+def get_file_head_revision_batch(files, batch_size=500):
     """
-    Get SVN HEAD revision numbers for multiple files in batches.
+    Get SVN HEAD revision numbers for multiple files in batches, one `svn info` call per batch.
     Returns a dictionary mapping file paths to revision numbers.
     """
-    config = load_config()
-    svn_path = config.get("svn_path")
     results = {}
 
-    wc_root = subprocess.run(
-        ["svn", "info", "--show-item", "wc-root", svn_path],
-        capture_output=True,
-        text=True,
-        shell=False,
-        creationflags=subprocess.CREATE_NO_WINDOW
-    ).stdout.strip().replace("\\", "/")
-    
-    for i in range(0, len(files), batch_size):
-        batch = files[i:i + batch_size]
-        valid_files = []
-        
-        # First check which files exist in SVN
-        for file in batch:
-            file_path = os.path.join(wc_root, file)
-            if os.path.exists(file_path):
-                valid_files.append(file)
-            else:
-                results[file] = ""
-                print(f"Skipping non-existent or system file: {file}")
-                log_error(f"Skipping non-existent or system file: {file}")
-        
-        if not valid_files:
-            continue
-            
-        # Process one file at a time for working copy paths
-        for file in valid_files:
-            try:
-                args = ["svn", "info", "--show-item", "last-changed-revision", file]
-                result = subprocess.run(args, capture_output=True, text=True, cwd=wc_root, shell=False, creationflags=subprocess.CREATE_NO_WINDOW)
-                
-                if result.returncode == 0:
-                    revision = result.stdout.strip()
-                    results[file] = revision
-                else:
-                    print(f"Warning: Could not get HEAD revision for {file}: {result.stderr}")
-                    log_error(f"Warning: Could not get HEAD revision for {file}: {result.stderr}")
-                    results[file] = ""
-                    
-            except Exception as e:
-                print(f"Error getting HEAD revision for {file}: {e}")
-                log_error(f"Error getting HEAD revision for {file}: {e}")
-                results[file] = ""
-                
+    wc_context = get_wc_context()
+    valid_files = _existing_files(files, wc_context.wc_root, results, "")
+    entries = _collect_info_entries(valid_files, wc_context, batch_size, "HEAD revisions")
+
+    for file in valid_files:
+        results[file] = entries.get(file, {}).get("commit_revision", "")
+
     return results
 
 def get_file_head_revision(file):
@@ -550,13 +725,7 @@ def view_file_native_diff(file_path):
         config = load_config()
         svn_path = config.get("svn_path")
 
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
+        wc_root = get_wc_context().wc_root
 
         full_path = os.path.join(wc_root, file_path)
         
@@ -684,72 +853,13 @@ def get_all_locked_files():
     """
     config = load_config()
     svn_path = config.get("svn_path", "").replace("\\", "/")
-    username = config.get("username")
 
     if not os.path.isdir(svn_path):
         messagebox.showwarning("Warning", "Invalid SVN path!")
         return []
 
     try:
-        wc_root = subprocess.run(
-            ["svn", "info", "--show-item", "wc-root", svn_path],
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        ).stdout.strip().replace("\\", "/")
-
-        result = subprocess.run(
-            ["svn", "status", "--xml", "--verbose"],
-            cwd=wc_root,
-            capture_output=True,
-            text=True,
-            shell=False,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        if result.returncode != 0:
-            raise Exception(result.stderr)
-
-        locked_files = []
-        root = ET.fromstring(result.stdout)
-
-        for entry in root.findall(".//entry"):
-            path = entry.get("path", "").replace("\\", "/")
-            wc_status = entry.find("wc-status")
-            
-            # Look for commit revision instead of wc-status revision
-            commit = wc_status.find("commit") if wc_status is not None else None
-            revision = commit.get("revision") if commit is not None else ""
-            
-            # If commit revision is not available, fall back to working copy revision
-            if not revision and wc_status is not None:
-                revision = wc_status.get("revision", "")
-
-            # Check wc-status and repos-status for lock
-            for status_tag in ["wc-status", "repos-status"]:
-                lock = entry.find(f"{status_tag}/lock")
-                relative_path = get_relative_path(svn_path).replace("\\", "/") if lock is not None else None
-                owner = lock.findtext("owner") if lock is not None else None
-                if (
-                    lock is not None
-                    and owner == username
-                    and (
-                        (relative_path and relative_path in path)
-                        or (not relative_path and not path.startswith("Projects"))
-                    )
-                ):
-                    created_utc = lock.findtext("created", "")
-                    if created_utc:
-                        dt_utc = datetime.strptime(created_utc.split(".")[0], "%Y-%m-%dT%H:%M:%S")
-                        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-                        dt_local = dt_utc.astimezone()  # Convert to local time
-                        lock_date = dt_local.strftime("%Y-%m-%d %H:%M:%S")
-                    else:
-                        lock_date = ""
-                    locked_files.append((path, revision, lock_date))
-                    break
-
-        return locked_files
+        return scan_locked_files(config)
 
     except ET.ParseError as e:
         messagebox.showerror("Error", f"Failed to parse SVN status XML:\n{e}")
@@ -784,8 +894,15 @@ def is_svn_repo_root(path):
 def get_relative_path(absolute_path):
     """
     Get the relative path from the SVN working copy root to the given absolute path.
-    Uses 'svn info' to determine the working copy root.
+    Paths inside the active working copy are resolved from the cached context,
+    other paths use 'svn info' to determine the working copy root.
     """
+    try:
+        relative_path = get_wc_context().relative_path_of(absolute_path)
+        if relative_path is not None:
+            return relative_path
+    except Exception:
+        pass
 
     try:
         result = subprocess.run(
@@ -0,0 +1,175 @@
+# test_sql_catalog.py
+# Every statement dbClass runs must be a constant from the statement catalog,
+# whatever the parameter values and IN list lengths, so Oracle parses it once.
+import pytest
+
+pytest.importorskip("oracledb")
+
+import db_handler
+from db_handler import dbClass, ReferenceData
+from sql_catalog import STATEMENTS, IN_LIST_SIZES
+
+CATALOG = set(STATEMENTS.values())
+
+class FakeVar:
+    def getvalue(self):
+        return [1]
+
+class FakeCursor:
+    """Records every execute and answers with rows holding the columns the callers read."""
+
+    columns = ("COUNT", "ID", "MAX_ID", "PATCH_ID", "PATCH_NAME", "FILE_ID", "NAME", "PATH", "CLEAN_PATH", "SCN")
+
+    def __init__(self, executed):
+        self.executed = executed
+        self.arraysize = 100
+        self.rows = 1
+        self.description = [(column,) for column in self.columns]
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        # next_ids returns one row per requested key
+        self.rows = (params or {}).get("count", 1) if isinstance(params, dict) else 1
+
+    def executemany(self, sql, rows):
+        self.executed.append((sql, rows))
+
+    def var(self, _type):
+        return FakeVar()
+
+    def fetchall(self):
+        return [(0, n + 1, 0, 1, "J1.0.1", 1, "none", "none", "none", 1) for n in range(self.rows)]
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+    def close(self):
+        pass
+
+REFERENCE_DATA = ReferenceData(
+    folders=[{"FOLDER_ID": 7, "PATH": "$/Projects/SVN/Database", "DESCRIPTION": "Database for J",
+              "FOLDER_TYPE": '2', "SOFT_PATH": "Database", "DEFAULT_PREFIX": "J", "SVN_PATH": "Database"}],
+    modules=[{"PREFIX": "J", "APPLICATION_ID": "CORE"}, {"PREFIX": "S", "APPLICATION_ID": "SYS"}],
+    checklist=[]
+)
+
+@pytest.fixture(params=[True, False], ids=["sequences", "locked-max"])
+def make_db(request, monkeypatch):
+    """dbClass factory over a fake session, with or without the key sequences."""
+    monkeypatch.setattr(db_handler, "_dsn", lambda dsn=None: "TEST")
+    monkeypatch.setattr(db_handler, "get_reference_data", lambda dsn=None, conn=None: REFERENCE_DATA)
+    monkeypatch.setattr(dbClass, "has_sequence", lambda self, table: request.param)
+
+    def make():
+        db = dbClass.__new__(dbClass)
+        db.conn = FakeConnection()
+        return db
+    return make
+
+def details(count, offset):
+    return [{
+        "folder": f"Database/S{offset}/f{offset + i}.sql",
+        "clean_path": f"Database/S{offset}/",
+        "name": f"f{offset + i}.sql",
+        "version": offset + i,
+        "soft_path": "Database",
+        "md5": f"{offset + i:032x}"
+    } for i in range(count)]
+
+def calls(offset):
+    """The same dbClass calls with values that differ for every offset."""
+    name = f"J{offset}.0.{offset}"
+    return [
+        lambda db: db.get_file_list(f"$/Projects/{offset}"),
+        lambda db: db.add_file(f"Database/{offset}/a.sql", "a.sql", 7, f"Database/{offset}/"),
+        lambda db: db.get_file_patch_list(f"Database/{offset}/", f"f{offset}.sql"),
+        lambda db: db.get_folder_patch_list(f"Database/{offset}"),
+        lambda db: db.get_folder_patch_list_new(f"Database/{offset}"),
+        lambda db: db.get_patch_dependencies(offset),
+        lambda db: db.create_patch_header("J" if offset % 2 else "S", f"{offset}.0.{offset}-S0",
+                                          f"comment {offset}", f"user{offset}", offset % 2 == 0, 2, 1, offset),
+        lambda db: db.update_patch_header(offset, "J", f"{offset}-W1", f"comment {offset}"),
+        lambda db: db.delete_patch_detail(offset),
+        lambda db: db.update_comment(offset, "x" * offset),
+        lambda db: db.create_patch_detail(offset, f"Database/{offset}/a.sql", f"Database/{offset}/", "a.sql", offset, 7),
+        lambda db: db.get_patch_list(offset % 2 == 0, "J"),
+        lambda db: db.get_patch_list_page(offset % 2 == 0, "S", None if offset == 1 else offset, 50 + offset),
+        lambda db: db.get_current_scn(),
+        lambda db: db.get_patch_list_changes(offset % 2 == 0, "J", offset * 100, offset, offset * 10),
+        lambda db: db.get_patch_by_name(name),
+        lambda db: db.get_patch_content(offset),
+        lambda db: db.get_all_patch_content(),
+        lambda db: db.remove_patch(offset),
+        lambda db: db.remove_patch_detail(offset),
+        lambda db: db.rename_patch(offset, name),
+        lambda db: db.get_max_version("J" if offset % 2 else "S"),
+        lambda db: db.get_build_list(offset),
+        lambda db: db.set_md5(offset, offset, f"{offset:032x}"),
+        lambda db: db.get_patch_file_list(offset),
+        lambda db: db.get_patch_file_list_new(offset),
+        lambda db: db.get_patch_doc_comment(offset),
+        lambda db: db.get_check_list(offset),
+        lambda db: db.check_patch_exists("J", f"{offset}.0.{offset}"),
+        lambda db: db.allocate_ids("FILES", offset),
+    ]
+
+def executed_sql(db, call):
+    db.conn.executed.clear()
+    call(db)
+    return [sql for sql, _ in db.conn.executed]
+
+def test_statements_do_not_change_with_parameters(make_db):
+    first, second = make_db(), make_db()
+    for call_1, call_2 in zip(calls(1), calls(2)):
+        statements_1 = executed_sql(first, call_1)
+        statements_2 = executed_sql(second, call_2)
+        assert statements_1, "every call runs at least one statement"
+        assert statements_1 == statements_2
+        for sql in statements_1:
+            assert sql in CATALOG, sql
+
+@pytest.mark.parametrize("count", [1, 9, 10, 11, 99, 100, 101, 999, 1000, 1001, 2500])
+def test_in_lists_use_catalog_sizes(make_db, count):
+    db = make_db()
+    db.conn.executed.clear()
+    db.create_patch_details(1, details(count, count))
+    lookups = [(sql, params) for sql, params in db.conn.executed if "NAME IN (" in sql]
+    assert lookups
+    for sql, params in lookups:
+        assert sql in CATALOG
+        # Padded to one of the catalog sizes, values only ever travel as binds
+        assert len(params) in IN_LIST_SIZES
+        assert sql == STATEMENTS[f"files_by_name.{len(params)}"]
+    # Every name is looked up exactly once
+    bound = [value for _, params in lookups for value in params.values() if value is not None]
+    assert sorted(bound) == sorted(detail["name"] for detail in details(count, count))
+    # Bulk inserts are catalog statements too
+    for sql, _ in db.conn.executed:
+        assert sql in CATALOG, sql
+
+def test_unknown_prefix_reloads_modules(monkeypatch):
+    """A prefix added after MODULE was cached is found by reloading once."""
+    monkeypatch.setattr(db_handler, "_dsn", lambda dsn=None: "TEST")
+    loads = []
+
+    def load(conn):
+        loads.append(conn)
+        modules = REFERENCE_DATA.modules + ([{"PREFIX": "N", "APPLICATION_ID": "NEW"}] if len(loads) > 1 else [])
+        return ReferenceData(folders=REFERENCE_DATA.folders, modules=modules, checklist=[])
+    monkeypatch.setattr(ReferenceData, "load", staticmethod(load))
+    db_handler.refresh_reference_data()
+
+    conn = FakeConnection()
+    assert db_handler.get_application_id("J", conn=conn) == "CORE"
+    assert db_handler.get_application_id("N", conn=conn) == "NEW"
+    assert len(loads) == 2
+    with pytest.raises(ValueError):
+        db_handler.get_application_id("Q", conn=conn)
+    db_handler.refresh_reference_data()
@@ -0,0 +1,59 @@
+# test_svn_info.py
+# _svn_info_batch must keep the entries svn printed before a failure and never invent the rest.
+from types import SimpleNamespace
+import pytest
+
+import svn_operations
+
+FILES = ["webpage\\a.asp", "Database/SCH/b.sql", "Database/SCH/c.sql"]
+
+OUTPUT = """<?xml version="1.0" encoding="UTF-8"?>
+<info>
+<entry kind="file" path="webpage\\a.asp" revision="12">
+<commit revision="10"><author>tester</author></commit>
+<lock><owner>tester</owner><created>2024-05-01T10:00:00.000000Z</created></lock>
+</entry>
+<entry kind="file" path="Database/SCH/b.sql" revision="12">
+<commit revision="11"><author>tester</author></commit>
+</entry>
+</info>
+"""
+
+@pytest.fixture
+def svn_output(monkeypatch):
+    """Make the svn info call answer with the given output, exit code and stderr."""
+    monkeypatch.setattr(svn_operations, "log_error", lambda message: None)
+    def answer(stdout, returncode=0, stderr=""):
+        result = SimpleNamespace(stdout=stdout, returncode=returncode, stderr=stderr)
+        monkeypatch.setattr(svn_operations, "_run_svn_targets", lambda *args, **kwargs: result)
+    return answer
+
+def test_entries_are_mapped_to_the_requested_paths(svn_output, capsys):
+    svn_output(OUTPUT)
+    entries = svn_operations._svn_info_batch(FILES, "/wc")
+    assert entries == {
+        "webpage\\a.asp": {"revision": "12", "commit_revision": "10",
+                           "lock_owner": "tester", "lock_created": "2024-05-01T10:00:00.000000Z"},
+        "Database/SCH/b.sql": {"revision": "12", "commit_revision": "11", "lock_owner": "", "lock_created": ""},
+    }
+    assert "no entry for 1 files: Database/SCH/c.sql" in capsys.readouterr().out
+
+def test_truncated_output_keeps_only_closed_entries(svn_output, capsys):
+    # Cut inside the second entry, which must not be reported half read
+    svn_output(OUTPUT[:OUTPUT.index("<commit revision=\"11\"")])
+    entries = svn_operations._svn_info_batch(FILES, "/wc")
+    assert list(entries) == ["webpage\\a.asp"]
+    out = capsys.readouterr().out
+    assert "ended early after 1 entries" in out
+    assert "no entry for 2 files" in out
+
+def test_failed_targets_are_reported(svn_output, capsys):
+    svn_output(OUTPUT, returncode=1, stderr="svn: E200009: Could not display info for all targets")
+    entries = svn_operations._svn_info_batch(FILES, "/wc")
+    assert list(entries) == ["webpage\\a.asp", "Database/SCH/b.sql"]
+    assert "exited with code 1" in capsys.readouterr().out
+
+def test_failure_without_entries_raises(svn_output):
+    svn_output("", returncode=1, stderr="svn: E155007: not a working copy")
+    with pytest.raises(Exception, match="E155007"):
+        svn_operations._svn_info_batch(FILES, "/wc")
@@ -0,0 +1,101 @@
+# test_wc_db.py
+# WorkingCopyDB must answer exactly what `svn info --xml` reports for a real working copy.
+import shutil
+import subprocess
+import xml.etree.ElementTree as ET
+from pathlib import Path
+import pytest
+
+from wc_db import WorkingCopyDB, SUPPORTED_FORMATS
+
+SVN = shutil.which("svn")
+SVNADMIN = shutil.which("svnadmin")
+USERNAME = "tester"
+
+pytestmark = pytest.mark.skipif(not (SVN and SVNADMIN), reason="svn and svnadmin are not installed")
+
+def run(*args, cwd=None):
+    result = subprocess.run(args, cwd=cwd, capture_output=True, text=True, encoding="utf-8")
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+def svn(wc, *args):
+    return run(SVN, "--non-interactive", "--username", USERNAME, *args, cwd=wc)
+
+@pytest.fixture(scope="module")
+def working_copy(tmp_path_factory):
+    """
+    A file:// checkout with files at different revisions, a lock held by this
+    working copy, a lock held by another one and a locally added file.
+    """
+    root = tmp_path_factory.mktemp("svn")
+    repo = root / "repo"
+    run(SVNADMIN, "create", str(repo))
+    url = repo.as_uri()
+
+    wc = root / "wc"
+    run(SVN, "checkout", "--non-interactive", url, str(wc))
+    (wc / "webpage").mkdir()
+    (wc / "Database" / "SCH").mkdir(parents=True)
+    (wc / "webpage" / "a.asp").write_text("a1")
+    (wc / "Database" / "SCH" / "b.sql").write_text("b1")
+    (wc / "Database" / "SCH" / "c.sql").write_text("c1")
+    svn(wc, "add", "webpage", "Database")
+    svn(wc, "commit", "-m", "first")
+    (wc / "webpage" / "a.asp").write_text("a2")
+    svn(wc, "commit", "-m", "second")
+    svn(wc, "update")
+
+    # A lock held by another working copy: visible in the repository, not ours
+    other = root / "other"
+    run(SVN, "checkout", "--non-interactive", url, str(other))
+    run(SVN, "--non-interactive", "--username", "someone", "lock", "Database/SCH/c.sql", cwd=other)
+
+    svn(wc, "lock", "Database/SCH/b.sql", "webpage/a.asp")
+    (wc / "webpage" / "new.asp").write_text("new")
+    svn(wc, "add", "webpage/new.asp")
+
+    db = WorkingCopyDB(str(wc / ".svn" / "wc.db"))
+    if db.format not in SUPPORTED_FORMATS:
+        pytest.skip(f"svn writes wc.db format {db.format}")
+    return wc, db
+
+def svn_info(wc, relpaths):
+    """svn info --xml of the targets, keyed by path, in the WorkingCopyDB.node_info shape."""
+    root = ET.fromstring(svn(wc, "info", "--xml", *relpaths))
+    info = {}
+    for entry in root.findall("entry"):
+        commit = entry.find("commit")
+        lock = entry.find("lock")
+        info[entry.get("path")] = {
+            "revision": entry.get("revision"),
+            "commit_revision": commit.get("revision") if commit is not None else "",
+            "lock_owner": lock.findtext("owner", "") if lock is not None else "",
+            "lock_created": lock.findtext("created", "") if lock is not None else "",
+        }
+    return info
+
+def test_node_info_matches_svn_info(working_copy):
+    wc, db = working_copy
+    committed = ["webpage/a.asp", "Database/SCH/b.sql", "Database/SCH/c.sql"]
+    assert db.node_info(committed) == svn_info(wc, committed)
+
+def test_node_info_leaves_out_local_additions_and_unknown_paths(working_copy):
+    _, db = working_copy
+    info = db.node_info(["webpage/new.asp", "webpage/missing.asp", "webpage/a.asp"])
+    assert list(info) == ["webpage/a.asp"]
+
+def test_node_info_accepts_windows_separators(working_copy):
+    _, db = working_copy
+    assert list(db.node_info(["Database\\SCH\\b.sql"])) == ["Database\\SCH\\b.sql"]
+
+def test_locked_files_matches_svn_info(working_copy):
+    wc, db = working_copy
+    info = svn_info(wc, ["webpage/a.asp", "Database/SCH/b.sql", "Database/SCH/c.sql"])
+    expected = sorted(
+        (path, entry["revision"], entry["commit_revision"], entry["lock_created"])
+        for path, entry in info.items() if entry["lock_owner"] == USERNAME
+    )
+    assert [path for path, *_ in expected] == ["Database/SCH/b.sql", "webpage/a.asp"]
+    assert db.locked_files(USERNAME) == expected
+    assert db.locked_files("someone") == []
@@ -35,8 +35,8 @@ def next_version(application_id: str) -> Optional[str]:
         Formatted version string or None if retrieval failed
     """
     try:
-        db = dbClass()
-        max_version = db.get_max_version(application_id)
+        with dbClass() as db:
+            max_version = db.get_max_version(application_id)
         if not max_version:
             messagebox.showerror("Error", "Failed to retrieve the max version")
             return None
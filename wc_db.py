@@ -0,0 +1,133 @@
+# wc_db.py
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from config import log_error
+
+# Set to False to always go through the svn command line
+USE_WC_DB = True
+
+# wc.db formats whose NODES/LOCK layout is known (31 = SVN 1.8 to 1.14)
+SUPPORTED_FORMATS = {31}
+
+# Keep IN (...) lists under SQLite's bound variable limit
+_QUERY_CHUNK_SIZE = 500
+
+_NODE_INFO_SQL = """
+SELECT N.LOCAL_RELPATH, N.OP_DEPTH, N.PRESENCE, N.REVISION, N.CHANGED_REVISION, L.LOCK_OWNER, L.LOCK_DATE
+FROM NODES N
+LEFT JOIN LOCK L ON L.REPOS_ID = N.REPOS_ID AND L.REPOS_RELPATH = N.REPOS_PATH
+WHERE N.WC_ID = ?
+AND N.LOCAL_RELPATH IN ({placeholders})
+ORDER BY N.LOCAL_RELPATH, N.OP_DEPTH
+"""
+
+_LOCKED_FILES_SQL = """
+SELECT N.LOCAL_RELPATH, N.REVISION, N.CHANGED_REVISION, L.LOCK_DATE
+FROM LOCK L
+JOIN NODES N ON N.REPOS_ID = L.REPOS_ID AND N.REPOS_PATH = L.REPOS_RELPATH
+WHERE N.WC_ID = ?
+AND N.OP_DEPTH = 0
+AND N.PRESENCE = 'normal'
+AND L.LOCK_OWNER = ?
+ORDER BY N.LOCAL_RELPATH
+"""
+
+def _apr_time_to_iso(apr_time):
+    """Convert an APR timestamp (microseconds since epoch, UTC) to the ISO format used by svn XML output."""
+    if not apr_time:
+        return ""
+    dt = datetime.fromtimestamp(apr_time / 1_000_000, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+class WorkingCopyDB:
+    """
+    Read-only access to a working copy's .svn/wc.db.
+    Answers revision and lock lookups with indexed SQL instead of spawning svn.
+    Every lookup opens its own short-lived connection, so instances can be
+    shared between threads and never hold locks on the working copy.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._uri = Path(db_path).as_uri() + "?mode=ro"
+        with closing(self._connect()) as conn:
+            self.format = conn.execute("PRAGMA user_version").fetchone()[0]
+            if self.format not in SUPPORTED_FORMATS:
+                raise ValueError(f"Unsupported wc.db format {self.format}")
+            row = conn.execute("SELECT ID FROM WCROOT ORDER BY ID LIMIT 1").fetchone()
+            if row is None:
+                raise ValueError("wc.db has no working copy root")
+            self.wc_id = row[0]
+
+    def _connect(self):
+        return sqlite3.connect(self._uri, uri=True, timeout=1.0)
+
+    def node_info(self, relpaths):
+        """
+        Look up BASE information for working copy relative paths.
+        Returns a dictionary mapping each path to a dictionary with the keys
+        revision, commit_revision, lock_owner and lock_created, the same shape
+        as the svn info parser produces.
+        Paths that are unknown, not present or have local add/copy layers are
+        left out so the caller can ask svn for them.
+        """
+        requested = {relpath.replace("\\", "/"): relpath for relpath in relpaths}
+        keys = list(requested)
+        rows = {}
+        with closing(self._connect()) as conn:
+            for i in range(0, len(keys), _QUERY_CHUNK_SIZE):
+                chunk = keys[i:i + _QUERY_CHUNK_SIZE]
+                sql = _NODE_INFO_SQL.format(placeholders=", ".join("?" * len(chunk)))
+                # Rows are ordered by op_depth, so the last one per path is the visible layer
+                for row in conn.execute(sql, [self.wc_id] + chunk):
+                    rows[row[0]] = row
+
+        results = {}
+        for local_relpath, op_depth, presence, revision, changed_revision, lock_owner, lock_date in rows.values():
+            if op_depth != 0 or presence != "normal":
+                continue
+            results[requested[local_relpath]] = {
+                "revision": str(revision) if revision is not None else "",
+                "commit_revision": str(changed_revision) if changed_revision is not None else "",
+                "lock_owner": lock_owner or "",
+                "lock_created": _apr_time_to_iso(lock_date),
+            }
+        return results
+
+    def locked_files(self, username):
+        """
+        List the files whose lock token for username is held by this working copy.
+        Returns a list of tuples (local_relpath, revision, commit_revision, lock_created).
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(_LOCKED_FILES_SQL, (self.wc_id, username)).fetchall()
+        return [
+            (
+                local_relpath,
+                str(revision) if revision is not None else "",
+                str(changed_revision) if changed_revision is not None else "",
+                _apr_time_to_iso(lock_date),
+            )
+            for local_relpath, revision, changed_revision, lock_date in rows
+        ]
+
+def open_wc_db(wc_root):
+    """
+    Open the wc.db of a working copy read-only.
+    Returns None when the backend is disabled, the file is missing or its
+    format is unknown, in which case callers use the svn command line.
+    """
+    if not USE_WC_DB or not wc_root:
+        return None
+    db_path = os.path.join(wc_root, ".svn", "wc.db")
+    if not os.path.isfile(db_path):
+        return None
+    try:
+        return WorkingCopyDB(db_path)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"wc.db backend unavailable, using svn command line: {e}")
+        log_error(f"wc.db backend unavailable, using svn command line: {e}")
+        return None